@@ -217,13 +217,16 @@ class HybridZoneRAPTOR:
         import pandas as pd
         
         # 가상 정거장 데이터 (스윙 주행 데이터 기반으로 생성된)
-        # 500개 또는 300개 버전 중 사용 (500개가 기본)
-        virtual_stations_file = self.virtual_stations_dir / 'virtual_stations_500.csv'
-        if not virtual_stations_file.exists():
-            virtual_stations_file = self.virtual_stations_dir / 'virtual_stations_300.csv'
+        # 500개 또는 300개 버전 중 사용 (500개가 기본, Parquet 우선)
+        candidates = [self.virtual_stations_dir / f'virtual_stations_{n}.{ext}'
+                      for n in (500, 300) for ext in ('parquet', 'csv')]
+        virtual_stations_file = next((p for p in candidates if p.exists()), candidates[-1])
         
         if virtual_stations_file.exists():
-            stations_df = pd.read_csv(virtual_stations_file)
+            if virtual_stations_file.suffix == '.parquet':
+                stations_df = pd.read_parquet(virtual_stations_file)
+            else:
+                stations_df = pd.read_csv(virtual_stations_file)
             for _, row in stations_df.iterrows():
                 self.kickboard_zones.append({
                     'id': row['station_id'],
@@ -509,7 +512,8 @@ class HybridZoneRAPTOR:
                 transit_routes = []
                 for journey in transit_journeys[:2]:
                     # Journey의 legs에서 대중교통 구간 정보 추출
-                    transit_legs = [leg for leg in journey.legs if leg.get('type') == 'transit']
+                    transit_legs = [leg for leg in self.transit_raptor.describe_legs(journey)
+                                    if leg['type'] == 'transit']
                     transit_routes.append({
                         'duration': journey.total_time,
                         'transfers': journey.transfers,
@@ -11,7 +11,7 @@ import json
 import numpy as np
 import networkx as nx
 from typing import Dict, List, Tuple, Optional, Set, Any
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
 from enum import Enum
@@ -19,6 +19,29 @@ import heapq
 import math
 import logging
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Numba는 선택적으로 import (없으면 순수 Python으로 동작)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 미설치 시 함수를 그대로 반환하는 대체 데코레이터"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# SciPy는 선택적으로 import (없으면 전체 정류장 탐색)
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    print("⚠️ SciPy 미설치 - 정류장 공간 인덱스 없이 전체 탐색")
 
 # PART1_2의 클래스 import (pickle 로드를 위해)
 sys.path.append('.')
@@ -105,9 +128,9 @@ class MobilityOption:
     battery: float = 100.0              # 배터리 잔량 (%)
     must_return_to_station: bool = False # 따릉이 여부
 
-@dataclass 
+@dataclass(frozen=True)
 class JourneyState:
-    """여정 중 상태"""
+    """여정 중 상태 (불변 - 변경 시 dataclasses.replace로 새 상태 생성)"""
     has_mobility: bool = False
     mobility_type: Optional[str] = None
     mobility_id: Optional[str] = None
@@ -115,17 +138,6 @@ class JourneyState:
     battery_remaining: float = 100.0
     must_return_to_station: bool = False
     total_cost: float = 0.0
-    
-    def copy(self):
-        return JourneyState(
-            has_mobility=self.has_mobility,
-            mobility_type=self.mobility_type,
-            mobility_id=self.mobility_id,
-            pickup_location=self.pickup_location,
-            battery_remaining=self.battery_remaining,
-            must_return_to_station=self.must_return_to_station,
-            total_cost=self.total_cost
-        )
 
 @dataclass
 class AccessOption:
@@ -137,6 +149,26 @@ class AccessOption:
     access_cost: float = 0.0
     initial_state: JourneyState = field(default_factory=JourneyState)
 
+# 여정 구간(leg) 저장 형식 - 구간당 dict 대신 고정 dtype 구조체 배열 사용
+# 정류장/노선 이름은 describe_legs()에서 필요할 때만 조회
+LEG_TYPES = ('access', 'transit', 'mobility', 'transfer', 'egress')
+LEG_ACCESS, LEG_TRANSIT, LEG_MOBILITY, LEG_TRANSFER, LEG_EGRESS = range(len(LEG_TYPES))
+LEG_MODES = tuple(mode.value for mode in TransportMode)
+LEG_MODE_CODES = {mode: code for code, mode in enumerate(LEG_MODES)}
+
+LEG_DTYPE = np.dtype([
+    ('type', 'u1'),       # LEG_TYPES 인덱스
+    ('mode', 'u1'),       # LEG_MODES 인덱스
+    ('from_idx', 'i4'),   # 출발 정류장 인덱스 (-1: 출발지)
+    ('to_idx', 'i4'),     # 도착 정류장 인덱스 (-1: 목적지)
+    ('route_idx', 'i4'),  # 노선 인덱스 (-1: 대중교통 아님)
+    ('dep', 'f4'),        # 출발 시각 (분, 없으면 NaN)
+    ('arr', 'f4'),        # 도착 시각 (분, 없으면 NaN)
+    ('duration', 'f4'),   # 소요 시간 (분)
+    ('cost', 'f4')        # 비용 (원)
+])
+MAX_LEGS = 16  # 재구성 시 미리 할당하는 구간 수 (부족하면 확장)
+
 @dataclass
 class Journey:
     """완성된 여정"""
@@ -149,7 +181,7 @@ class Journey:
     transfers: int
     total_walk_distance: float
     
-    legs: List[Dict] = field(default_factory=list)
+    legs: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=LEG_DTYPE))
     used_mobility: List[str] = field(default_factory=list)
     
     def get_score(self, preference: RoutePreference) -> float:
@@ -211,6 +243,42 @@ BATTERY_CONSUMPTION = {
 MAX_ROUNDS = 6
 INF = float('inf')
 
+# 도보 거리 설정
+EARTH_RADIUS_M = 6371000       # 지구 반지름 (미터)
+OSM_WALK_MAX_DISTANCE = 300    # 이 거리 이내만 OSM 실제 경로 계산 (미터)
+WALK_DETOUR_FACTOR = 1.2       # 도보 우회 계수 (직선거리 대비)
+OSM_WALK_WORKERS = 8           # OSM 최단경로 동시 계산 스레드 수
+
+# 모빌리티 도달 정류장 탐색 설정
+MOBILITY_REACHABLE_TOP_N = 50      # 모빌리티로 도달 가능한 정류장 중 반환 개수
+METERS_PER_DEGREE = 111320         # 위도 1도당 거리 (미터, 평면 근사용)
+
+@njit(cache=True)
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """두 좌표 간 직선거리 (미터)"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+    
+    a = (math.sin(delta_lat/2)**2 + 
+         math.cos(lat1_rad) * math.cos(lat2_rad) * 
+         math.sin(delta_lon/2)**2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    
+    return EARTH_RADIUS_M * c
+
+@njit(cache=True)
+def _walk_fast(lat1, lon1, lat2, lon2):
+    """도보 거리 빠른 경로 - (거리, 확정여부) 반환
+    
+    OSM 계산 범위 밖이면 근사 거리로 확정, 범위 안이면 직선거리만 반환
+    """
+    straight_distance = _haversine_m(lat1, lon1, lat2, lon2)
+    if straight_distance > OSM_WALK_MAX_DISTANCE:
+        return straight_distance * WALK_DETOUR_FACTOR, True
+    return straight_distance, False
+
 # ============================================================================
 # 3. 메인 클래스
 # ============================================================================
@@ -229,6 +297,17 @@ class TimeExpandedMultimodalRAPTOR:
         # 성능 최적화용 캐시
         self._mobility_reachable_cache = {}
         self._road_distance_cache = {}
+        self._road_distance_lock = threading.Lock()  # 병렬 OSM 계산용
+        self._nearest_node_cache = {}
+        
+        # 상태가 없는 정류장의 기본 여정 상태 (불변이므로 공유)
+        self._default_state = JourneyState()
+        
+        # 접근점 정보 (RAPTOR 실행마다 갱신)
+        self._access_dep_times: List[float] = []
+        
+        # 도보 속도 (m/분) - 도보 시간/거리 변환마다 재계산하지 않도록 보관
+        self._walk_m_per_min = SPEEDS[TransportMode.WALK] * 1000 / 60
         
         # RAPTOR 데이터 추출
         self.stops = self.raptor_data['stops']
@@ -241,6 +320,16 @@ class TimeExpandedMultimodalRAPTOR:
         self.stop_index_map = self.raptor_data['stop_index_map']
         self.index_to_stop = self.raptor_data['index_to_stop']
         
+        # 노선 인덱스 (여정 구간 배열에 노선을 정수로 저장)
+        self._route_ids = list(self.routes.keys())
+        self._route_index = {route_id: i for i, route_id in enumerate(self._route_ids)}
+        self._route_short_names = np.array(
+            [self.routes[route_id].route_short_name for route_id in self._route_ids], dtype=object
+        )
+        
+        # 정류장 공간 인덱스 (모빌리티 도달 정류장 후보 축소용)
+        self._stop_tree, self._stop_tree_ids = self._build_stop_tree()
+        
         # 모빌리티 데이터
         self.bike_stations = self.raptor_data.get('bike_stations', {})
         self.shared_vehicles = self.raptor_data.get('shared_vehicles', [])
@@ -260,6 +349,29 @@ class TimeExpandedMultimodalRAPTOR:
         except Exception as e:
             raise Exception(f"RAPTOR 데이터 로드 실패: {e}")
     
+    def _build_stop_tree(self):
+        """정류장 좌표를 평면(미터)으로 투영한 KD-tree 생성"""
+        if not SCIPY_AVAILABLE or not self.stops:
+            return None, []
+        
+        stop_ids = list(self.stops.keys())
+        lats = np.array([self.stops[sid].stop_lat for sid in stop_ids])
+        lons = np.array([self.stops[sid].stop_lon for sid in stop_ids])
+        
+        # 강남구 범위는 좁으므로 평균 위도 기준 평면 근사
+        self._proj_lat0 = float(lats.mean())
+        self._proj_lon0 = float(lons.mean())
+        self._proj_lon_scale = METERS_PER_DEGREE * math.cos(math.radians(self._proj_lat0))
+        
+        xy = np.column_stack([(lons - self._proj_lon0) * self._proj_lon_scale,
+                              (lats - self._proj_lat0) * METERS_PER_DEGREE])
+        return cKDTree(xy), stop_ids
+    
+    def _project(self, coords: Tuple[float, float]) -> Tuple[float, float]:
+        """위경도를 정류장 KD-tree 평면 좌표(미터)로 변환"""
+        return ((coords[1] - self._proj_lon0) * self._proj_lon_scale,
+                (coords[0] - self._proj_lat0) * METERS_PER_DEGREE)
+    
     def _load_road_network(self) -> nx.Graph:
         """도로 네트워크 로드"""
         try:
@@ -316,7 +428,7 @@ class TimeExpandedMultimodalRAPTOR:
             distance = self._calculate_walk_distance(origin, (stop.stop_lat, stop.stop_lon))
             
             if distance <= max_distance:
-                walk_time = distance / (SPEEDS[TransportMode.WALK] * 1000 / 60)  # 분 변환
+                walk_time = distance / self._walk_m_per_min  # 분 변환
                 
                 if stop_id in self.stop_index_map:
                     options.append(AccessOption(
@@ -328,7 +440,7 @@ class TimeExpandedMultimodalRAPTOR:
                         initial_state=JourneyState()
                     ))
         
-        return sorted(options, key=lambda x: x.access_time)[:20]  # 상위 20개만
+        return heapq.nsmallest(20, options, key=lambda x: x.access_time)  # 상위 20개만
     
     def _find_mobility_access(self, origin: Tuple[float, float],
                             preference: RoutePreference) -> List[AccessOption]:
@@ -341,7 +453,7 @@ class TimeExpandedMultimodalRAPTOR:
         for mobility in nearby_mobility:
             # 모빌리티까지 도보 시간
             pickup_distance = self._calculate_distance(origin, mobility.coords)
-            pickup_time = pickup_distance / (SPEEDS[TransportMode.WALK] * 1000 / 60)
+            pickup_time = pickup_distance / self._walk_m_per_min
             
             # 이 모빌리티로 갈 수 있는 정류장들
             reachable_stops = self._compute_mobility_reachable_stops(
@@ -388,7 +500,7 @@ class TimeExpandedMultimodalRAPTOR:
             )
             
             if distance <= radius:
-                pickup_time = distance / (SPEEDS[TransportMode.WALK] * 1000 / 60)
+                pickup_time = distance / self._walk_m_per_min
                 
                 nearby.append(MobilityOption(
                     type=vehicle['type'],
@@ -412,7 +524,7 @@ class TimeExpandedMultimodalRAPTOR:
             )
             
             if distance <= 800:  # 800m 내 스테이션만
-                walk_time = distance / (SPEEDS[TransportMode.WALK] * 1000 / 60)
+                walk_time = distance / self._walk_m_per_min
                 
                 # 이 스테이션에서 갈 수 있는 정류장들
                 bike_reachable = self._compute_bike_reachable_stops(
@@ -461,7 +573,8 @@ class TimeExpandedMultimodalRAPTOR:
         # 성능 최적화: 거리순으로 정렬하여 상위 N개만 반환
         candidates = []
         
-        for stop_id, stop in self.stops.items():
+        for stop_id in self._nearest_stop_candidates(from_coords, max_distance):
+            stop = self.stops[stop_id]
             stop_coords = (stop.stop_lat, stop.stop_lon)
             
             # 1차 필터링: 직선거리로 빠르게 필터링
@@ -483,7 +596,7 @@ class TimeExpandedMultimodalRAPTOR:
         
         # 거리순 정렬 후 상위 50개만 반환
         candidates.sort(key=lambda x: x[3])
-        reachable = [(sid, tt, c) for sid, tt, c, _ in candidates[:50]]
+        reachable = [(sid, tt, c) for sid, tt, c, _ in candidates[:MOBILITY_REACHABLE_TOP_N]]
         
         # 캐시 저장 (최대 1000개까지)
         if len(self._mobility_reachable_cache) < 1000:
@@ -491,6 +604,19 @@ class TimeExpandedMultimodalRAPTOR:
         
         return reachable
     
+    def _nearest_stop_candidates(self, from_coords: Tuple[float, float], max_distance: float):
+        """반경 내 정류장 후보 (KD-tree 없으면 전체 정류장)
+        
+        반경 밖 정류장은 직선거리 필터에서 제외되므로 반경 내 정류장만 보면 충분
+        """
+        if self._stop_tree is None:
+            return self.stops.keys()
+        
+        # 평면 근사 오차를 감안해 반경에 1% 여유 (정류장 순서로 정렬해 결과 순서 고정)
+        idxs = self._stop_tree.query_ball_point(self._project(from_coords),
+                                                r=max_distance * 1.01, return_sorted=True)
+        return [self._stop_tree_ids[i] for i in idxs]
+    
     def _compute_bike_reachable_stops(self, station_coords: Tuple[float, float]) -> List[Tuple[str, float, float]]:
         """따릉이로 도달 가능한 정류장들 계산"""
         reachable = []
@@ -563,24 +689,28 @@ class TimeExpandedMultimodalRAPTOR:
         tau = [[INF] * n_stops for _ in range(MAX_ROUNDS + 1)]
         
         # journey_states[k][stop] = 라운드 k에서 stop에서의 여정 상태
-        journey_states = [{} for _ in range(MAX_ROUNDS + 1)]
+        # (정류장 인덱스가 연속된 정수이므로 dict 대신 객체 배열, 기본값은 공유 상태 하나)
+        journey_states = [np.full(n_stops, self._default_state, dtype=object)
+                          for _ in range(MAX_ROUNDS + 1)]
         
         # parent 추적 (경로 재구성용)
         parent = [{} for _ in range(MAX_ROUNDS + 1)]
         
         # 1. 초기화: 접근점들 설정
         initial_stops = []
+        self._access_dep_times = []
         for option in access_options:
             arrival_time = departure_time + option.access_time
             stop_idx = option.stop_idx
             
             tau[0][stop_idx] = arrival_time
-            journey_states[0][stop_idx] = option.initial_state.copy()
+            journey_states[0][stop_idx] = option.initial_state
             parent[0][stop_idx] = {
                 'type': 'access',
                 'access_option': option,
                 'departure_time': departure_time
             }
+            self._access_dep_times.append(departure_time)
             initial_stops.append((option.stop_id, arrival_time))
         
         print(f"   초기 접근 정류장: {len(initial_stops)}개")
@@ -627,7 +757,7 @@ class TimeExpandedMultimodalRAPTOR:
         return journeys
     
     def _route_based_propagation(self, k: int, tau: List[List[float]], 
-                               journey_states: List[Dict], parent: List[Dict]) -> Set[int]:
+                               journey_states: List[np.ndarray], parent: List[Dict]) -> Set[int]:
         """대중교통 노선 기반 전파 - RAPTOR 표준 알고리즘"""
         marked = set()
         routes_to_scan = set()
@@ -704,11 +834,8 @@ class TimeExpandedMultimodalRAPTOR:
                             if alight_time < tau[k][alight_stop_idx]:
                                 tau[k][alight_stop_idx] = alight_time
                                 
-                                # 여정 상태 복사
-                                board_state = journey_states[k-1].get(
-                                    self.stop_index_map[board_stop_id], JourneyState()
-                                )
-                                journey_states[k][alight_stop_idx] = board_state.copy()
+                                # 여정 상태 (불변이므로 그대로 공유)
+                                board_state = journey_states[k-1][self.stop_index_map[board_stop_id]]
                                 
                                 # 대중교통 비용 추가 (첫 탑승 시에만)
                                 # board_state가 이미 같은 노선을 타고 있었는지 확인
@@ -717,9 +844,12 @@ class TimeExpandedMultimodalRAPTOR:
                                     # 새로운 노선에 탑승하는 경우만 비용 추가
                                     route = self.routes.get(route_id)
                                     if route and route.route_type == 1:  # 지하철
-                                        journey_states[k][alight_stop_idx].total_cost += COSTS[TransportMode.SUBWAY]
+                                        fare = COSTS[TransportMode.SUBWAY]
                                     else:  # 버스
-                                        journey_states[k][alight_stop_idx].total_cost += COSTS[TransportMode.BUS]
+                                        fare = COSTS[TransportMode.BUS]
+                                    board_state = replace(board_state, total_cost=board_state.total_cost + fare)
+                                
+                                journey_states[k][alight_stop_idx] = board_state
                                 
                                 parent[k][alight_stop_idx] = {
                                     'type': 'route',
@@ -737,7 +867,7 @@ class TimeExpandedMultimodalRAPTOR:
         return marked
     
     def _mobility_based_propagation(self, k: int, tau: List[List[float]],
-                                  journey_states: List[Dict], parent: List[Dict]) -> Set[int]:
+                                  journey_states: List[np.ndarray], parent: List[Dict]) -> Set[int]:
         """모빌리티 기반 전파"""
         marked = set()
         
@@ -747,7 +877,7 @@ class TimeExpandedMultimodalRAPTOR:
                 continue
             
             current_time = tau[k-1][stop_idx]
-            current_state = journey_states[k-1].get(stop_idx, JourneyState())
+            current_state = journey_states[k-1][stop_idx]
             stop_id = self.index_to_stop.get(stop_idx)
             
             if not stop_id or stop_id not in self.stops:
@@ -782,14 +912,16 @@ class TimeExpandedMultimodalRAPTOR:
                         tau[k][target_stop_idx] = arrival_time
                         
                         # 새로운 모빌리티 상태
-                        new_state = current_state.copy()
-                        new_state.has_mobility = True
-                        new_state.mobility_type = option.type
-                        new_state.mobility_id = option.mobility_id
-                        new_state.pickup_location = option.coords
-                        new_state.battery_remaining = option.battery - (travel_time * BATTERY_CONSUMPTION.get(option.type, 0))
-                        new_state.must_return_to_station = option.must_return_to_station
-                        new_state.total_cost += cost
+                        new_state = replace(
+                            current_state,
+                            has_mobility=True,
+                            mobility_type=option.type,
+                            mobility_id=option.mobility_id,
+                            pickup_location=option.coords,
+                            battery_remaining=option.battery - (travel_time * BATTERY_CONSUMPTION.get(option.type, 0)),
+                            must_return_to_station=option.must_return_to_station,
+                            total_cost=current_state.total_cost + cost
+                        )
                         
                         journey_states[k][target_stop_idx] = new_state
                         
@@ -868,7 +1000,7 @@ class TimeExpandedMultimodalRAPTOR:
             )
             
             if distance <= radius:
-                walk_time = distance / (SPEEDS[TransportMode.WALK] * 1000 / 60)
+                walk_time = distance / self._walk_m_per_min
                 nearby.append({
                     'id': station_id,
                     'lat': station['lat'],
@@ -879,7 +1011,7 @@ class TimeExpandedMultimodalRAPTOR:
         return nearby
     
     def _transfer_propagation_expanded(self, k: int, tau: List[List[float]],
-                                     journey_states: List[Dict], parent: List[Dict],
+                                     journey_states: List[np.ndarray], parent: List[Dict],
                                      journey_type: JourneyType):
         """확장된 환승 전파 (도보 + 모빌리티)"""
         
@@ -892,7 +1024,7 @@ class TimeExpandedMultimodalRAPTOR:
                 continue
             
             current_time = tau[k][stop_idx]
-            current_state = journey_states[k].get(stop_idx, JourneyState())
+            current_state = journey_states[k][stop_idx]
             
             # 기존 도보 환승
             for transfer_stop_id, transfer_time in self.transfers[stop_id]:
@@ -904,7 +1036,7 @@ class TimeExpandedMultimodalRAPTOR:
                 
                 if arrival_time < tau[k][transfer_idx]:
                     tau[k][transfer_idx] = arrival_time
-                    journey_states[k][transfer_idx] = current_state.copy()
+                    journey_states[k][transfer_idx] = current_state  # 도보 환승은 상태 변화 없음
                     
                     parent[k][transfer_idx] = {
                         'type': 'transfer',
@@ -923,7 +1055,7 @@ class TimeExpandedMultimodalRAPTOR:
     
     def _add_mobility_transfers(self, k: int, stop_idx: int, stop_id: str,
                               current_time: float, current_state: JourneyState,
-                              tau: List[List[float]], journey_states: List[Dict], 
+                              tau: List[List[float]], journey_states: List[np.ndarray], 
                               parent: List[Dict]):
         """모빌리티 기반 환승 추가"""
         
@@ -948,11 +1080,13 @@ class TimeExpandedMultimodalRAPTOR:
                 if arrival_time < tau[k][target_idx]:
                     tau[k][target_idx] = arrival_time
                     
-                    new_state = current_state.copy()
-                    new_state.has_mobility = True
-                    new_state.mobility_type = option.type
-                    new_state.mobility_id = option.mobility_id
-                    new_state.total_cost += cost
+                    new_state = replace(
+                        current_state,
+                        has_mobility=True,
+                        mobility_type=option.type,
+                        mobility_id=option.mobility_id,
+                        total_cost=current_state.total_cost + cost
+                    )
                     
                     journey_states[k][target_idx] = new_state
                     
@@ -972,7 +1106,7 @@ class TimeExpandedMultimodalRAPTOR:
     # ========================================================================
     
     def _collect_destination_journeys(self, destination: Tuple[float, float],
-                                    tau: List[List[float]], journey_states: List[Dict],
+                                    tau: List[List[float]], journey_states: List[np.ndarray],
                                     parent: List[Dict], preference: RoutePreference) -> List[Journey]:
         """목적지로 도달하는 모든 경로 수집"""
         
@@ -986,11 +1120,8 @@ class TimeExpandedMultimodalRAPTOR:
             stop = self.stops[stop_id]
             print(f"      - {stop.stop_name}: {egress_time:.1f}분 도보")
         
-        # 출발 시간 가져오기 (첫 번째 접근점의 출발시간)
-        departure_time = INF
-        for stop_idx in range(len(tau[0])):
-            if stop_idx in parent[0] and parent[0][stop_idx]['type'] == 'access':
-                departure_time = min(departure_time, parent[0][stop_idx]['departure_time'])
+        # 출발 시간 가져오기 (접근점 초기화 시 기록한 출발시간)
+        departure_time = min(self._access_dep_times, default=INF)
         
         # 각 라운드에서 도달 가능한 정류장 확인
         found_paths = 0
@@ -1016,7 +1147,7 @@ class TimeExpandedMultimodalRAPTOR:
                     # 경로 재구성
                     journey = self._reconstruct_journey(
                         destination, k, stop_idx, arrival_time,
-                        egress_time, egress_mode, journey_states[k].get(stop_idx, JourneyState()),
+                        egress_time, egress_mode, journey_states[k][stop_idx],
                         parent
                     )
                     
@@ -1035,12 +1166,7 @@ class TimeExpandedMultimodalRAPTOR:
         unique_transit_journeys = {}
         for journey in journeys:
             # 대중교통 구간만 추출
-            transit_key = []
-            for leg in journey.legs:
-                if leg['type'] == 'transit':
-                    transit_key.append((leg['from'], leg['to'], leg.get('route_name', '')))
-            
-            transit_tuple = tuple(transit_key)
+            transit_tuple = self._transit_key(journey)
             
             # 처음 보는 대중교통 경로이거나 더 짧은 도보 거리인 경우만 저장
             if transit_tuple not in unique_transit_journeys or \
@@ -1053,15 +1179,34 @@ class TimeExpandedMultimodalRAPTOR:
                               max_distance: float) -> List[Tuple[str, float, str]]:
         """목적지 근처 정류장들 찾기"""
         dest_stops = []
+        osm_candidates = []
         
         for stop_id, stop in self.stops.items():
-            distance = self._calculate_walk_distance(destination, (stop.stop_lat, stop.stop_lon))
+            stop_coords = (stop.stop_lat, stop.stop_lon)
+            distance, done = _walk_fast(destination[0], destination[1], 
+                                        stop_coords[0], stop_coords[1])
             
-            if distance <= max_distance:
-                walk_time = distance / (SPEEDS[TransportMode.WALK] * 1000 / 60)
+            if not done:
+                # OSM 계산 범위 - 아래에서 스레드 풀로 처리
+                osm_candidates.append((stop_id, stop_coords, distance))
+            elif distance <= max_distance:
+                walk_time = distance / self._walk_m_per_min
                 dest_stops.append((stop_id, walk_time, 'walk'))
         
-        return sorted(dest_stops, key=lambda x: x[1])[:20]  # 상위 20개
+        # OSM 최단경로 계산은 동시에 실행
+        if osm_candidates:
+            with ThreadPoolExecutor(max_workers=OSM_WALK_WORKERS) as executor:
+                distances = list(executor.map(
+                    lambda c: self._walk_osm_slow(destination, c[1], c[2]),
+                    osm_candidates
+                ))
+            
+            for (stop_id, _, _), distance in zip(osm_candidates, distances):
+                if distance <= max_distance:
+                    walk_time = distance / self._walk_m_per_min
+                    dest_stops.append((stop_id, walk_time, 'walk'))
+        
+        return heapq.nsmallest(20, dest_stops, key=lambda x: x[1])  # 상위 20개
     
     def _reconstruct_journey(self, destination: Tuple[float, float], final_round: int,
                            final_stop_idx: int, arrival_time: float, egress_time: float,
@@ -1070,7 +1215,8 @@ class TimeExpandedMultimodalRAPTOR:
         """경로 재구성"""
         
         try:
-            legs = []
+            legs = np.empty(MAX_LEGS, dtype=LEG_DTYPE)
+            n_legs = 0
             current_round = final_round
             current_stop_idx = final_stop_idx
             total_walk_distance = 0
@@ -1079,42 +1225,30 @@ class TimeExpandedMultimodalRAPTOR:
             last_route_id = None  # 이전 노선 추적
             
             # 도착 구간 추가
-            final_stop_id = self.index_to_stop[final_stop_idx]
-            final_stop = self.stops[final_stop_id]
+            legs[n_legs] = (LEG_EGRESS, LEG_MODE_CODES[egress_mode], final_stop_idx, -1, -1,
+                            arrival_time, arrival_time + egress_time, egress_time, 0)
+            n_legs += 1
             
-            legs.append({
-                'type': 'egress',
-                'mode': egress_mode,
-                'from': final_stop.stop_name,
-                'to': 'destination',
-                'departure_time': arrival_time,
-                'arrival_time': arrival_time + egress_time,
-                'duration': egress_time,
-                'distance': egress_time * SPEEDS[TransportMode.WALK] * 1000 / 60
-            })
-            
-            total_walk_distance += egress_time * SPEEDS[TransportMode.WALK] * 1000 / 60
+            total_walk_distance += egress_time * self._walk_m_per_min
             
             # 역방향으로 경로 추적
             while current_round >= 0 and current_stop_idx in parent[current_round]:
                 p = parent[current_round][current_stop_idx]
                 
+                if n_legs == len(legs):
+                    legs = np.concatenate([legs, np.empty(MAX_LEGS, dtype=LEG_DTYPE)])
+                
                 if p['type'] == 'access':
                     # 접근 구간
                     option = p['access_option']
-                    legs.append({
-                        'type': 'access',
-                        'mode': option.access_mode.value,
-                        'from': 'origin',
-                        'to': self.stops[option.stop_id].stop_name,
-                        'departure_time': p['departure_time'],
-                        'arrival_time': p['departure_time'] + option.access_time,
-                        'duration': option.access_time,
-                        'cost': option.access_cost
-                    })
+                    legs[n_legs] = (LEG_ACCESS, LEG_MODE_CODES[option.access_mode.value],
+                                    -1, option.stop_idx, -1,
+                                    p['departure_time'], p['departure_time'] + option.access_time,
+                                    option.access_time, option.access_cost)
+                    n_legs += 1
                     
                     if option.access_mode == TransportMode.WALK:
-                        total_walk_distance += option.access_time * SPEEDS[TransportMode.WALK] * 1000 / 60
+                        total_walk_distance += option.access_time * self._walk_m_per_min
                     else:
                         used_mobility.append(option.access_mode.value)
                     
@@ -1124,18 +1258,25 @@ class TimeExpandedMultimodalRAPTOR:
                     # 대중교통 구간
                     route = self.routes[p['route_id']]
                     mode = 'subway' if route.route_type == 1 else 'bus'
+                    route_idx = self._route_index[p['route_id']]
+                    cost = COSTS[TransportMode.SUBWAY] if mode == 'subway' else COSTS[TransportMode.BUS]
                     
-                    legs.append({
-                        'type': 'transit',
-                        'mode': mode,
-                        'route_name': route.route_short_name,
-                        'from': self.stops[p['board_stop']].stop_name,
-                        'to': self.stops[p['alight_stop']].stop_name,
-                        'departure_time': p['board_time'],
-                        'arrival_time': p['alight_time'],
-                        'duration': p['alight_time'] - p['board_time'],
-                        'cost': COSTS[TransportMode.SUBWAY] if mode == 'subway' else COSTS[TransportMode.BUS]
-                    })
+                    prev_leg = legs[n_legs - 1]
+                    if prev_leg['type'] == LEG_TRANSIT and \
+                       self._route_short_names[prev_leg['route_idx']] == route.route_short_name:
+                        # 같은 노선의 연속 구간이면 직전 구간의 출발 정보만 앞당김
+                        prev_leg['mode'] = LEG_MODE_CODES[mode]
+                        prev_leg['from_idx'] = p['from_stop']
+                        prev_leg['route_idx'] = route_idx
+                        prev_leg['dep'] = p['board_time']
+                        prev_leg['duration'] = prev_leg['arr'] - p['board_time']
+                        prev_leg['cost'] = cost
+                    else:
+                        legs[n_legs] = (LEG_TRANSIT, LEG_MODE_CODES[mode],
+                                        p['from_stop'], current_stop_idx, route_idx,
+                                        p['board_time'], p['alight_time'],
+                                        p['alight_time'] - p['board_time'], cost)
+                        n_legs += 1
                     
                     # 환승은 다른 노선으로 갈아탈 때만 카운트
                     if last_route_id is not None and last_route_id != p['route_id']:
@@ -1147,16 +1288,12 @@ class TimeExpandedMultimodalRAPTOR:
                 
                 elif p['type'] in ['mobility', 'mobility_transfer']:
                     # 모빌리티 구간
-                    legs.append({
-                        'type': 'mobility',
-                        'mode': p['mobility_type'],
-                        'from': self.stops[p['from_stop']].stop_name,
-                        'to': self.stops[p['to_stop']].stop_name,
-                        'pickup_time': p['pickup_time'],
-                        'travel_time': p['travel_time'],
-                        'duration': p['pickup_time'] + p['travel_time'],
-                        'cost': COSTS[TransportMode(p['mobility_type'])]
-                    })
+                    legs[n_legs] = (LEG_MOBILITY, LEG_MODE_CODES[p['mobility_type']],
+                                    p['from_stop_idx'], current_stop_idx, -1,
+                                    np.nan, np.nan,
+                                    p['pickup_time'] + p['travel_time'],
+                                    COSTS[TransportMode(p['mobility_type'])])
+                    n_legs += 1
                     
                     used_mobility.append(p['mobility_type'])
                     
@@ -1170,61 +1307,32 @@ class TimeExpandedMultimodalRAPTOR:
                 
                 elif p['type'] == 'transfer':
                     # 환승 구간
-                    legs.append({
-                        'type': 'transfer',
-                        'mode': p['transfer_type'],
-                        'from': self.stops[p['from_stop']].stop_name,
-                        'to': self.stops[p['to_stop']].stop_name,
-                        'duration': p['transfer_time'],
-                        'cost': 0
-                    })
+                    legs[n_legs] = (LEG_TRANSFER, LEG_MODE_CODES[p['transfer_type']],
+                                    p['from_stop_idx'], current_stop_idx, -1,
+                                    np.nan, np.nan, p['transfer_time'], 0)
+                    n_legs += 1
                     
                     if p['transfer_type'] == 'walk':
-                        total_walk_distance += p['transfer_time'] * SPEEDS[TransportMode.WALK] * 1000 / 60
+                        total_walk_distance += p['transfer_time'] * self._walk_m_per_min
                     
                     current_stop_idx = p['from_stop_idx']
                 
                 else:
                     break
             
-            # 리스트 뒤집기 (시간 순서대로)
-            legs.reverse()
-            
-            # 같은 노선의 연속된 구간 합치기
-            merged_legs = []
-            current_transit_leg = None
-            
-            for leg in legs:
-                if leg['type'] == 'transit' and current_transit_leg and \
-                   current_transit_leg['type'] == 'transit' and \
-                   current_transit_leg.get('route_name') == leg.get('route_name'):
-                    # 같은 노선이면 도착지와 시간만 업데이트
-                    current_transit_leg['to'] = leg['to']
-                    current_transit_leg['arrival_time'] = leg['arrival_time']
-                    current_transit_leg['duration'] = current_transit_leg['arrival_time'] - current_transit_leg['departure_time']
-                else:
-                    # 다른 노선이거나 대중교통이 아니면 새로운 leg
-                    if current_transit_leg:
-                        merged_legs.append(current_transit_leg)
-                    current_transit_leg = leg if leg['type'] == 'transit' else None
-                    if leg['type'] != 'transit':
-                        merged_legs.append(leg)
-            
-            # 마지막 transit leg 추가
-            if current_transit_leg:
-                merged_legs.append(current_transit_leg)
-            
-            legs = merged_legs
+            # 뒤집기 (시간 순서대로)
+            legs = legs[:n_legs][::-1].copy()
             
             # Journey 객체 생성
-            total_time = arrival_time + egress_time - legs[0]['departure_time'] if legs else 0
+            departure_time = float(legs[0]['dep']) if len(legs) else 0
+            total_time = arrival_time + egress_time - departure_time if len(legs) else 0
             # 비용은 final_state에 이미 정확히 계산되어 있음
             total_cost = final_state.total_cost
             
             return Journey(
                 origin=destination,  # 임시
                 destination=destination,
-                departure_time=legs[0]['departure_time'] if legs else 0,
+                departure_time=departure_time,
                 arrival_time=arrival_time + egress_time,
                 total_time=total_time,
                 total_cost=total_cost,
@@ -1238,6 +1346,50 @@ class TimeExpandedMultimodalRAPTOR:
             logger.error(f"경로 재구성 오류: {e}")
             return None
     
+    def _leg_stop_name(self, stop_idx: int, default: str) -> str:
+        """구간 배열의 정류장 인덱스를 정류장 이름으로 변환"""
+        if stop_idx < 0:
+            return default
+        return self.stops[self.index_to_stop[int(stop_idx)]].stop_name
+    
+    def _transit_key(self, journey: Journey) -> Tuple:
+        """대중교통 구간 (출발, 도착, 노선명) 튜플 - 중복 경로 판별용"""
+        transit_legs = journey.legs[journey.legs['type'] == LEG_TRANSIT]
+        return tuple(
+            (self._leg_stop_name(leg['from_idx'], ''),
+             self._leg_stop_name(leg['to_idx'], ''),
+             self._route_short_names[leg['route_idx']])
+            for leg in transit_legs
+        )
+    
+    def describe_legs(self, journey: Journey) -> List[Dict]:
+        """여정 구간을 정류장/노선 이름이 포함된 dict 목록으로 변환"""
+        described = []
+        
+        for leg in journey.legs:
+            leg_type = LEG_TYPES[leg['type']]
+            info = {
+                'type': leg_type,
+                'mode': LEG_MODES[leg['mode']],
+                'from': self._leg_stop_name(leg['from_idx'], 'origin'),
+                'to': self._leg_stop_name(leg['to_idx'], 'destination'),
+                'duration': float(leg['duration']),
+                'cost': float(leg['cost'])
+            }
+            
+            if not np.isnan(leg['dep']):
+                info['departure_time'] = float(leg['dep'])
+                info['arrival_time'] = float(leg['arr'])
+            
+            if leg_type == 'transit':
+                info['route_name'] = self._route_short_names[leg['route_idx']]
+            elif leg_type == 'egress':
+                info['distance'] = info['duration'] * self._walk_m_per_min
+            
+            described.append(info)
+        
+        return described
+    
     # ========================================================================
     # 7. 파레토 최적화
     # ========================================================================
@@ -1259,10 +1411,7 @@ class TimeExpandedMultimodalRAPTOR:
                 journey.total_walk_distance <= preference.max_walk_distance):
                 
                 # 경로 키 생성 (주요 경유 정류장 포함)
-                main_stops = []
-                for leg in journey.legs:
-                    if leg['type'] == 'transit':
-                        main_stops.append((leg['from'], leg['to'], leg.get('route_name', '')))
+                main_stops = self._transit_key(journey)
                 
                 # 출발/도착 시간을 분 단위로 반올림해서 미세한 차이는 무시
                 journey_key = (
@@ -1270,7 +1419,7 @@ class TimeExpandedMultimodalRAPTOR:
                     round(journey.arrival_time),    # 분 단위 반올림
                     journey.total_cost,
                     journey.transfers,
-                    tuple(main_stops)
+                    main_stops
                 )
                 
                 # 중복이 아니거나 더 나은 점수인 경우만 저장
@@ -1322,16 +1471,11 @@ class TimeExpandedMultimodalRAPTOR:
             seen_keys = set()
             for journey in filtered:
                 # 더 구체적인 키로 중복 체크 (주요 대중교통 구간 포함)
-                transit_segments = []
-                for leg in journey.legs:
-                    if leg['type'] == 'transit':
-                        transit_segments.append((leg['from'], leg['to'], leg.get('route_name', '')))
-                
                 key = (
                     round(journey.total_time), 
                     journey.transfers, 
                     journey.total_cost,
-                    tuple(transit_segments)  # 주요 대중교통 구간 포함
+                    self._transit_key(journey)  # 주요 대중교통 구간 포함
                 )
                 
                 if key not in seen_keys:
@@ -1349,33 +1493,22 @@ class TimeExpandedMultimodalRAPTOR:
     # ========================================================================
     
     def _time_to_minutes(self, time_str: str) -> int:
-        """시간 문자열을 분으로 변환"""
+        """시간 문자열을 분으로 변환 (HH:MM, strptime 없이 직접 파싱)"""
         try:
-            time_obj = datetime.strptime(time_str, "%H:%M")
-            return time_obj.hour * 60 + time_obj.minute
-        except:
-            # 기본값: 오전 8시
-            return 8 * 60
+            hours, minutes = time_str.split(':')
+            hours, minutes = int(hours), int(minutes)
+            if 0 <= hours < 24 and 0 <= minutes < 60:
+                return hours * 60 + minutes
+        except (ValueError, AttributeError):
+            pass
+        
+        # 기본값: 오전 8시
+        return 8 * 60
     
     def _calculate_distance(self, coord1: Tuple[float, float], 
                           coord2: Tuple[float, float]) -> float:
         """두 좌표 간 직선거리 계산 (미터)"""
-        lat1, lon1 = coord1
-        lat2, lon2 = coord2
-        
-        R = 6371000  # 지구 반지름 (미터)
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_lat/2)**2 + 
-             math.cos(lat1_rad) * math.cos(lat2_rad) * 
-             math.sin(delta_lon/2)**2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        return R * c
+        return _haversine_m(coord1[0], coord1[1], coord2[0], coord2[1])
     
     def _calculate_road_distance(self, coord1: Tuple[float, float],
                                coord2: Tuple[float, float]) -> float:
@@ -1386,10 +1519,17 @@ class TimeExpandedMultimodalRAPTOR:
     def _calculate_walk_distance(self, coord1: Tuple[float, float],
                                coord2: Tuple[float, float]) -> float:
         """도보 거리 계산 - 짧은 거리는 OSM 사용"""
-        straight_distance = self._calculate_distance(coord1, coord2)
+        distance, done = _walk_fast(coord1[0], coord1[1], coord2[0], coord2[1])
+        if done:
+            return distance
         
         # 300m 이내이고 OSM 네트워크가 있으면 실제 경로 계산
-        if straight_distance <= 300 and self.road_network:
+        return self._walk_osm_slow(coord1, coord2, distance)
+    
+    def _walk_osm_slow(self, coord1: Tuple[float, float],
+                       coord2: Tuple[float, float], straight_distance: float) -> float:
+        """OSM 도로망 기반 도보 거리 (NetworkX 최단경로, 캐시 사용)"""
+        if self.road_network:
             # 캐시 확인
             cache_key = (round(coord1[0], 5), round(coord1[1], 5), 
                         round(coord2[0], 5), round(coord2[1], 5))
@@ -1407,15 +1547,16 @@ class TimeExpandedMultimodalRAPTOR:
                                                         node1, node2, weight='length')
                     
                     # 캐시 저장
-                    if len(self._road_distance_cache) < 5000:
-                        self._road_distance_cache[cache_key] = path_length
+                    with self._road_distance_lock:
+                        if len(self._road_distance_cache) < 5000:
+                            self._road_distance_cache[cache_key] = path_length
                     
                     return path_length
             except:
                 pass
         
-        # 실패시 또는 먼 거리는 근사값
-        return straight_distance * 1.2  # 도보는 1.2 계수 (더 직선적)
+        # 실패시 근사값
+        return straight_distance * WALK_DETOUR_FACTOR  # 도보는 1.2 계수 (더 직선적)
     
     def _find_nearest_node(self, coord: Tuple[float, float]) -> Optional[Any]:
         """가장 가까운 도로 네트워크 노드 찾기"""
@@ -1469,7 +1610,7 @@ class TimeExpandedMultimodalRAPTOR:
             print(f"🛴 사용 모빌리티: {', '.join(set(journey.used_mobility))}")
         
         print(f"\n📋 상세 경로:")
-        for i, leg in enumerate(journey.legs, 1):
+        for i, leg in enumerate(self.describe_legs(journey), 1):
             mode_emoji = {
                 'walk': '🚶', 'bus': '🚌', 'subway': '🚇',
                 'bike': '🚲', 'kickboard': '🛴', 'ebike': '🚴'
@@ -8,12 +8,14 @@ OTP 스타일 멀티모달 RAPTOR
 
 import pickle
 import json
+import math
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Set, Any
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 from enum import Enum
+from functools import lru_cache
 import logging
 import time
 import pandas as pd
@@ -29,9 +31,217 @@ except ImportError as e:
     print(f"Import error: {e}")
     exit(1)
 
+# Numba는 선택적으로 import (없으면 순수 Python으로 동작)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 미설치 시 함수를 그대로 반환하는 대체 데코레이터"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# scikit-learn은 선택적으로 import (없으면 NumPy 거리 계산)
+try:
+    from sklearn.neighbors import BallTree
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+    print("⚠️ scikit-learn 미설치 - NumPy 기반 반경 탐색 사용")
+
+# SciPy는 선택적으로 import (없으면 전체 정거장 거리 계산)
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    print("⚠️ SciPy 미설치 - 정거장 공간 인덱스 없이 전체 탐색")
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+EARTH_RADIUS_M = 6371000  # 지구 반경 (미터)
+METERS_PER_DEGREE = 111320  # 위도 1도당 거리 (미터, 평면 근사용)
+TAU_INF = np.iinfo(np.int32).max  # 미도달 도착 시간 (int32 분 단위 최대값)
+TT_PAD = TAU_INF  # 시간표 빈 칸 (해당 정류장 운행 없음) - 어떤 도착 시간보다 늦음
+PARENT_WALK = -2  # 부모 노선 인덱스 - 도보 환승
+NEAREST_CACHE_SIZE = 4096  # 격자 셀별 후보 정거장 캐시 크기 (LRU)
+NEAREST_CELL_MARGIN_M = 100  # 셀 중심 ↔ 실제 좌표 최대 오차 여유 (0.001° 격자 대각선 절반 ≈ 71m)
+
+def _neighbors_within(lats: np.ndarray, lons: np.ndarray, radius_m: float,
+                      query_lats: Optional[np.ndarray] = None,
+                      query_lons: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """질의 지점별 반경 내 지점들의 (인덱스 배열, 거리 배열(미터))
+    
+    질의 지점 미지정 시 (lats, lons) 자신을 질의 (자기 자신 포함)
+    """
+    coords = np.radians(np.column_stack([lats, lons]))
+    if query_lats is None:
+        query = coords
+    else:
+        query = np.radians(np.column_stack([query_lats, query_lons]))
+    
+    # 질의 지점이 없으면 빈 결과 (BallTree는 빈 질의 배열에서 ValueError)
+    if len(query) == 0:
+        return []
+    
+    if len(coords) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return [(empty, np.zeros(0)) for _ in range(len(query))]
+    
+    if SKLEARN_AVAILABLE:
+        tree = BallTree(coords, metric='haversine')
+        idx_arr, dist_arr = tree.query_radius(query, r=radius_m / EARTH_RADIUS_M,
+                                              return_distance=True)
+        return [(idx, dist * EARTH_RADIUS_M) for idx, dist in zip(idx_arr, dist_arr)]
+    
+    # BallTree가 없으면 질의 지점별로 전체 거리를 한 번에 계산
+    cos_lat = np.cos(coords[:, 0])
+    neighbors = []
+    for i in range(len(query)):
+        delta_phi = coords[:, 0] - query[i, 0]
+        delta_lambda = coords[:, 1] - query[i, 1]
+        a = np.sin(delta_phi/2)**2 + np.cos(query[i, 0]) * cos_lat * np.sin(delta_lambda/2)**2
+        dist = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+        idx = np.flatnonzero(dist <= radius_m)
+        neighbors.append((idx, dist[idx]))
+    return neighbors
+
+@njit(cache=True, fastmath=True)
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """두 지점 간 거리 (미터)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+    
+    a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    
+    return EARTH_RADIUS_M * c
+
+@njit(cache=True)
+def _bit_test(words, idx):
+    """정류장 비트마스크(uint64 워드 배열)에서 idx 비트 확인"""
+    return (words[idx >> 6] >> np.uint64(idx & 63)) & np.uint64(1) != 0
+
+@njit(cache=True)
+def _bit_set(words, idx):
+    """정류장 비트마스크(uint64 워드 배열)에 idx 비트 설정"""
+    words[idx >> 6] |= np.uint64(1) << np.uint64(idx & 63)
+
+@njit(cache=True)
+def _bit_indices(words):
+    """정류장 비트마스크에서 켜진 정류장 인덱스 (오름차순)"""
+    out = np.empty(len(words) * 64, dtype=np.int32)
+    count = 0
+    for w_idx in range(len(words)):
+        w = words[w_idx]
+        bit = 0
+        while w != 0:
+            if w & np.uint64(1):
+                out[count] = (w_idx << 6) + bit
+                count += 1
+            w >>= np.uint64(1)
+            bit += 1
+    return out[:count]
+
+@njit(cache=True)
+def _collect_routes(marked, sr_indptr, sr_routes, sr_seqs, route_start):
+    """마크된 정류장을 지나는 노선 인덱스(오름차순)와 노선별 가장 앞선 정류장 순번
+    
+    route_start는 TAU_INF로 채워진 노선 수 크기 버퍼 (사용 후 원래대로 복구)
+    """
+    marked_stops = _bit_indices(marked)
+    touched = np.empty(len(route_start), dtype=np.int32)
+    n_touched = 0
+    for i in range(len(marked_stops)):
+        stop_idx = marked_stops[i]
+        for e in range(sr_indptr[stop_idx], sr_indptr[stop_idx + 1]):
+            r = sr_routes[e]
+            if route_start[r] == TAU_INF:
+                touched[n_touched] = r
+                n_touched += 1
+            if sr_seqs[e] < route_start[r]:
+                route_start[r] = sr_seqs[e]
+    
+    routes = np.sort(touched[:n_touched])
+    start_seqs = np.empty(n_touched, dtype=np.int32)
+    for i in range(n_touched):
+        start_seqs[i] = route_start[routes[i]]
+        route_start[routes[i]] = TAU_INF
+    return routes, start_seqs
+
+@njit(cache=True)
+def _scan_routes(routes, start_seqs, rs_off, rs_stops, tt_off, tt_width, tt_data,
+                 marked, tau, tau_round_k, par_stop_k, par_route_k, par_trip_k,
+                 new_marked, new_order):
+    """라운드별 노선 스캔 - 마크된 정류장에서 탑승, 이후 정류장 도착 시간 개선
+    
+    노선 순서대로 tau를 바로 갱신하므로 앞선 노선이 개선한 도착 시간으로 뒤 노선에 탑승
+    개선된 정류장은 new_marked 비트마스크와 (처음 마크된 순서대로) new_order에 기록하고
+    개수를 반환
+    """
+    n_new = 0
+    for i in range(len(routes)):
+        r = routes[i]
+        width = tt_width[r]
+        earliest_trip = -1
+        boarding_stop = -1
+        
+        for seq in range(start_seqs[i], rs_off[r + 1] - rs_off[r]):
+            stop_idx = rs_stops[rs_off[r] + seq]
+            if stop_idx < 0:
+                continue
+            row = tt_off[r] + seq * width
+            
+            # 탑승 가능 확인
+            if earliest_trip == -1 and _bit_test(marked, stop_idx):
+                # 다음 출발 찾기 (이진 탐색)
+                trip_idx = np.searchsorted(tt_data[row:row + width], tau[stop_idx])
+                if trip_idx < width and tt_data[row + trip_idx] != TT_PAD:
+                    earliest_trip = trip_idx
+                    boarding_stop = stop_idx
+            
+            # 하차 및 개선
+            elif earliest_trip != -1:
+                arrival = tt_data[row + earliest_trip]
+                if arrival < tau[stop_idx]:
+                    tau[stop_idx] = arrival
+                    tau_round_k[stop_idx] = arrival
+                    par_stop_k[stop_idx] = boarding_stop
+                    par_route_k[stop_idx] = r
+                    par_trip_k[stop_idx] = earliest_trip
+                    if not _bit_test(new_marked, stop_idx):
+                        _bit_set(new_marked, stop_idx)
+                        new_order[n_new] = stop_idx
+                        n_new += 1
+    
+    return n_new
+
+@njit(cache=True)
+def _relax_transfers(srcs, tr_indptr, tr_indices, tr_times,
+                     tau, tau_round_k, par_stop_k, par_route_k, par_trip_k, marked):
+    """도보 환승 완화 - srcs 순서대로 CSR 환승 간선을 따라 도착 시간 개선
+    
+    개선된 정류장은 marked 비트마스크에 기록
+    """
+    for i in range(len(srcs)):
+        stop_idx = srcs[i]
+        for e in range(tr_indptr[stop_idx], tr_indptr[stop_idx + 1]):
+            next_idx = tr_indices[e]
+            new_arrival = tau[stop_idx] + tr_times[e]
+            
+            if new_arrival < tau[next_idx]:
+                tau[next_idx] = new_arrival
+                tau_round_k[next_idx] = new_arrival
+                par_stop_k[next_idx] = stop_idx
+                par_route_k[next_idx] = PARENT_WALK
+                par_trip_k[next_idx] = tr_times[e]
+                _bit_set(marked, next_idx)
+
 @dataclass
 class OTPJourney:
     """OTP 스타일 여정"""
@@ -51,6 +261,10 @@ class OTPJourney:
 class OTPStyleMultimodalRAPTOR:
     """OTP 스타일 통합 RAPTOR"""
     
+    # 가상 노선 공통 출발 시간 - 5분 간격으로 운행 (06:00 ~ 23:00), 읽기 전용 공유
+    _DEFAULT_DEPARTURES = np.arange(6 * 60, 23 * 60, 5, dtype=np.int32)
+    _DEFAULT_DEPARTURES.flags.writeable = False
+    
     def __init__(self, data_dir: str = 'gangnam_raptor_data',
                  virtual_stations_dir: str = 'grid_virtual_stations'):
         """초기화"""
@@ -61,7 +275,7 @@ class OTPStyleMultimodalRAPTOR:
         self.all_stops: Dict[str, Stop] = {}
         self.all_routes: Dict[str, Route] = {}
         self.all_trips: Dict[str, Trip] = {}
-        self.all_timetables: Dict[str, List[List[int]]] = {}
+        self.all_timetables: Dict[str, np.ndarray] = {}  # (정류장 순번, 열차) int32
         self.all_route_stops: Dict[str, List[str]] = {}
         self.all_transfers: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
         
@@ -71,6 +285,9 @@ class OTPStyleMultimodalRAPTOR:
         self.kickboard_locations: Dict[str, Dict] = {}
         self.bike_stations: Dict[str, Dict] = {}
         
+        # 소요시간별 가상 노선 시간표 (같은 소요시간의 노선끼리 공유)
+        self._virtual_timetable_cache: Dict[int, np.ndarray] = {}
+        
         # 초기화
         self._load_all_data()
         self._build_integrated_network()
@@ -93,7 +310,10 @@ class OTPStyleMultimodalRAPTOR:
         self.all_stops = data['stops'].copy()
         self.all_routes = data['routes'].copy()
         self.all_trips = data['trips'].copy()
-        self.all_timetables = data['timetables'].copy()
+        self.all_timetables = {
+            route_id: self._timetable_array(timetable)
+            for route_id, timetable in data['timetables'].items()
+        }
         self.all_route_stops = data['route_stop_sequences'].copy()
         
         # 환승 데이터
@@ -112,17 +332,24 @@ class OTPStyleMultimodalRAPTOR:
     
     def _load_virtual_stations(self):
         """가상 정거장 데이터 로드"""
-        # 500대 시나리오 사용
-        stations_file = self.virtual_stations_dir / 'virtual_stations_500.csv'
-        kickboards_file = self.virtual_stations_dir / 'kickboards_500.csv'
+        # 500대 시나리오 사용 (Parquet 우선, 없으면 기존 CSV)
+        stations_file = self.virtual_stations_dir / 'virtual_stations_500.parquet'
+        kickboards_file = self.virtual_stations_dir / 'kickboards_500.parquet'
+        if not stations_file.exists():
+            stations_file = stations_file.with_suffix('.csv')
+            kickboards_file = kickboards_file.with_suffix('.csv')
         
         if not stations_file.exists():
             logger.warning("가상 정거장 데이터 없음. 생성 필요")
             return
         
         # 가상 정거장 로드
-        stations_df = pd.read_csv(stations_file)
-        kickboards_df = pd.read_csv(kickboards_file)
+        if stations_file.suffix == '.parquet':
+            stations_df = pd.read_parquet(stations_file)
+            kickboards_df = pd.read_parquet(kickboards_file)
+        else:
+            stations_df = pd.read_csv(stations_file)
+            kickboards_df = pd.read_csv(kickboards_file)
         
         # 가상 정거장을 Stop으로 변환
         for _, row in stations_df.iterrows():
@@ -201,24 +428,23 @@ class OTPStyleMultimodalRAPTOR:
         route_id = 5000  # 따릉이 노선 ID는 5000번대
         
         # 가까운 대여소끼리 연결 (최대 3km - 따릉이는 더 먼 거리 가능)
+        neighbors = _neighbors_within(
+            np.array([self.all_stops[s].stop_lat for s in bike_stations]),
+            np.array([self.all_stops[s].stop_lon for s in bike_stations]),
+            3000
+        )
+        
         for i, from_station in enumerate(bike_stations):
             from_stop = self.all_stops[from_station]
             
-            # 성능을 위해 근처 대여소만 확인
-            nearby_stations = []
-            for to_station in bike_stations:
-                if from_station != to_station:
-                    to_stop = self.all_stops[to_station]
-                    dist = self._haversine_distance(
-                        from_stop.stop_lat, from_stop.stop_lon,
-                        to_stop.stop_lat, to_stop.stop_lon
-                    )
-                    if dist <= 3000:  # 3km 이내
-                        nearby_stations.append((to_station, dist))
+            # 자기 자신 제외, 거리순 정렬 (같은 거리는 대여소 순서) 후 상위 5개만 연결
+            idx, dists = neighbors[i]
+            keep = idx != i
+            idx, dists = idx[keep], dists[keep]
+            order = np.lexsort((idx, dists))[:5]
             
-            # 거리순 정렬 후 상위 5개만 연결
-            nearby_stations.sort(key=lambda x: x[1])
-            for to_station, dist in nearby_stations[:5]:
+            for j in order:
+                to_station, dist = bike_stations[idx[j]], dists[j]
                 route_key = f"VR_BIKE_{route_id:04d}"
                 
                 # Route 생성
@@ -236,81 +462,71 @@ class OTPStyleMultimodalRAPTOR:
                 
                 # 시간표 (15km/h 평균 속도)
                 travel_time = int(dist / 1000 / 15 * 60)  # 분
-                departure_times = []
-                
-                # 5분 간격으로 운행 (06:00 ~ 23:00)
-                for hour in range(6, 23):
-                    for minute in range(0, 60, 5):
-                        dep_time = hour * 60 + minute
-                        departure_times.append(dep_time)
-                
-                # 시간표 생성 [출발역 시간, 도착역 시간]
-                self.all_timetables[route_key] = [
-                    departure_times,  # 출발역
-                    [t + travel_time for t in departure_times]  # 도착역
-                ]
+                self.all_timetables[route_key] = self._virtual_timetable(travel_time)
                 
                 route_id += 1
         
         logger.info(f"따릉이 가상 노선 생성: {route_id-5000}개")
     
+    def _virtual_timetable(self, travel_time: int) -> np.ndarray:
+        """가상 노선 시간표 [출발역 시간, 도착역 시간] - 소요시간별로 한 번만 생성 (읽기 전용)"""
+        timetable = self._virtual_timetable_cache.get(travel_time)
+        if timetable is None:
+            timetable = np.vstack([
+                self._DEFAULT_DEPARTURES,  # 출발역
+                self._DEFAULT_DEPARTURES + travel_time  # 도착역
+            ])
+            timetable.flags.writeable = False
+            self._virtual_timetable_cache[travel_time] = timetable
+        return timetable
+    
     def _create_virtual_routes(self):
         """가상 정거장 간 노선 생성"""
         route_id = 1
         virtual_stations = list(self.virtual_stops.keys())
         
         # 가까운 정거장끼리 연결 (최대 2km)
+        neighbors = _neighbors_within(
+            np.array([self.all_stops[s].stop_lat for s in virtual_stations]),
+            np.array([self.all_stops[s].stop_lon for s in virtual_stations]),
+            2000
+        )
+        
         for i, from_station in enumerate(virtual_stations):
-            from_stop = self.all_stops[from_station]
+            # 이후 정거장만 (각 쌍은 한 번만, 정거장 순서대로)
+            idx, dists = neighbors[i]
+            keep = idx > i
+            order = np.argsort(idx[keep])
             
-            for to_station in virtual_stations[i+1:]:
-                to_stop = self.all_stops[to_station]
-                
-                # 거리 계산
-                dist = self._haversine_distance(
-                    from_stop.stop_lat, from_stop.stop_lon,
-                    to_stop.stop_lat, to_stop.stop_lon
-                )
+            for to_pos, dist in zip(idx[keep][order], dists[keep][order]):
+                to_station = virtual_stations[to_pos]
                 
-                if dist <= 2000:  # 2km 이내
-                    # 양방향 가상 노선 생성
-                    for direction, (start, end) in enumerate([
-                        (from_station, to_station),
-                        (to_station, from_station)
-                    ]):
-                        route_key = f"VR_KICK_{route_id:04d}"
-                        
-                        # Route 생성
-                        route = Route(
-                            route_id=route_key,
-                            route_short_name=f"킥보드{route_id}",
-                            route_long_name=f"{self.all_stops[start].stop_name}→"
-                                          f"{self.all_stops[end].stop_name}",
-                            route_type=11,  # 킥보드 노선
-                            n_trips=1
-                        )
-                        self.all_routes[route_key] = route
-                        
-                        # 정류장 순서
-                        self.all_route_stops[route_key] = [start, end]
-                        
-                        # 시간표 (20km/h 속도)
-                        travel_time = int(dist / 1000 / 20 * 60)  # 분
-                        departure_times = []
-                        
-                        # 5분 간격으로 운행 (06:00 ~ 23:00)
-                        for hour in range(6, 23):
-                            for minute in range(0, 60, 5):
-                                dep_time = hour * 60 + minute
-                                departure_times.append(dep_time)
-                        
-                        # 시간표 생성 [출발역 시간, 도착역 시간]
-                        self.all_timetables[route_key] = [
-                            departure_times,  # 출발역
-                            [t + travel_time for t in departure_times]  # 도착역
-                        ]
-                        
-                        route_id += 1
+                # 양방향 가상 노선 생성
+                for direction, (start, end) in enumerate([
+                    (from_station, to_station),
+                    (to_station, from_station)
+                ]):
+                    route_key = f"VR_KICK_{route_id:04d}"
+                    
+                    # Route 생성
+                    route = Route(
+                        route_id=route_key,
+                        route_short_name=f"킥보드{route_id}",
+                        route_long_name=f"{self.all_stops[start].stop_name}→"
+                                      f"{self.all_stops[end].stop_name}",
+                        route_type=11,  # 킥보드 노선
+                        n_trips=1
+                    )
+                    self.all_routes[route_key] = route
+                    
+                    # 정류장 순서
+                    self.all_route_stops[route_key] = [start, end]
+                    
+                    # 시간표 (20km/h 속도)
+                    travel_time = int(dist / 1000 / 20 * 60)  # 분
+                    self.all_timetables[route_key] = self._virtual_timetable(travel_time)
+                    
+                    route_id += 1
         
         logger.info(f"가상 노선 생성: {route_id-1}개")
     
@@ -323,33 +539,166 @@ class OTPStyleMultimodalRAPTOR:
         self.stop_idx_to_id = {i: stop_id for i, stop_id in enumerate(self.all_stops.keys())}
         self.stop_id_to_idx = {stop_id: i for i, stop_id in enumerate(self.all_stops.keys())}
         
+        # 3. 정거장 좌표 배열 (최근접 정거장 벡터 연산용, 인덱스 순서 동일)
+        self._stop_ids = np.array(list(self.all_stops.keys()), dtype=object)
+        self._stop_lats = np.fromiter((s.stop_lat for s in self.all_stops.values()),
+                                      dtype=np.float64, count=len(self.all_stops))
+        self._stop_lons = np.fromiter((s.stop_lon for s in self.all_stops.values()),
+                                      dtype=np.float64, count=len(self.all_stops))
+        self._stop_cos_lat = np.cos(np.radians(self._stop_lats))
+        self._stop_tree = self._build_stop_tree()
+        self._nearest_cache: OrderedDict = OrderedDict()
+        
+        # 4. 정거장별 경유 노선 인덱스 [(노선 ID, 정류장 순번)] - 마크된 정거장의 노선만 스캔
+        self._route_ids = list(self.all_routes.keys())
+        self._route_order = {route_id: i for i, route_id in enumerate(self._route_ids)}
+        self.routes_by_stop: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+        for route_id in self.all_routes.keys():
+            stop_sequence = self.all_route_stops.get(route_id, [])
+            if not stop_sequence or len(self.all_timetables.get(route_id, [])) == 0:
+                continue
+            for seq, stop_id in enumerate(stop_sequence):
+                if stop_id in self.stop_id_to_idx:
+                    self.routes_by_stop[stop_id].append((route_id, seq))
+        
+        # RAPTOR용 정수 인덱스 CSR (정류장 인덱스 → 노선 인덱스, 정류장 순번)
+        self._sr_indptr = np.zeros(len(self.all_stops) + 1, dtype=np.int32)
+        sr_routes = []
+        sr_seqs = []
+        for stop_idx in range(len(self.all_stops)):
+            for route_id, seq in self.routes_by_stop.get(self.stop_idx_to_id[stop_idx], ()):
+                sr_routes.append(self._route_order[route_id])
+                sr_seqs.append(seq)
+            self._sr_indptr[stop_idx + 1] = len(sr_routes)
+        self._sr_routes = np.array(sr_routes, dtype=np.int32)
+        self._sr_seqs = np.array(sr_seqs, dtype=np.int32)
+        self._route_start = np.full(len(self._route_ids), TAU_INF, dtype=np.int32)
+        
+        # 5. 노선별 정류장 순번 (같은 정류장이 여러 번 나오면 첫 순번)
+        self.route_stop_position: Dict[str, Dict[str, int]] = {}
+        for route_id, stop_sequence in self.all_route_stops.items():
+            position = {}
+            for seq, stop_id in enumerate(stop_sequence):
+                position.setdefault(stop_id, seq)
+            self.route_stop_position[route_id] = position
+        
+        # 6. RAPTOR 커널용 평탄화 배열 (노선 시간표, 환승 CSR)
+        self._build_raptor_arrays()
+        self._build_transfer_csr()
+        
         logger.info(f"통합 네트워크 구축 완료: {len(self.all_transfers)} 환승")
     
+    def _build_stop_tree(self):
+        """정거장 좌표를 평면(미터)으로 투영한 KD-tree 생성 (인덱스 = 정거장 인덱스)"""
+        if not SCIPY_AVAILABLE or len(self._stop_lats) == 0:
+            return None
+        
+        # 강남구 범위는 좁으므로 평균 위도 기준 평면 근사
+        self._proj_lat0 = float(self._stop_lats.mean())
+        self._proj_lon0 = float(self._stop_lons.mean())
+        self._proj_lon_scale = METERS_PER_DEGREE * np.cos(np.radians(self._proj_lat0))
+        
+        xy = np.column_stack([(self._stop_lons - self._proj_lon0) * self._proj_lon_scale,
+                              (self._stop_lats - self._proj_lat0) * METERS_PER_DEGREE])
+        return cKDTree(xy)
+    
+    def _project(self, lat: float, lon: float) -> Tuple[float, float]:
+        """위경도를 정거장 KD-tree 평면 좌표(미터)로 변환"""
+        return ((lon - self._proj_lon0) * self._proj_lon_scale,
+                (lat - self._proj_lat0) * METERS_PER_DEGREE)
+    
+    def _build_raptor_arrays(self):
+        """노선 정류장/시간표를 연속 배열로 평탄화 (노선 인덱스 = all_routes 순서)
+        
+        - rs_stops[rs_off[r]:rs_off[r+1]]: 노선 r의 정류장 인덱스 (미등록 정류장은 -1)
+        - tt_data[tt_off[r]:...]: 노선 r의 (정류장 순번 × 열차) 시간표, 빈 칸은 TT_PAD
+        """
+        n_routes = len(self._route_ids)
+        self._rs_off = np.zeros(n_routes + 1, dtype=np.int32)
+        self._tt_off = np.zeros(n_routes, dtype=np.int64)
+        self._tt_width = np.zeros(n_routes, dtype=np.int32)
+        
+        rs_stops = []
+        tt_blocks = []
+        tt_size = 0
+        for r, route_id in enumerate(self._route_ids):
+            stop_sequence = self.all_route_stops.get(route_id, [])
+            timetable = self.all_timetables.get(route_id)
+            n_rows = 0 if timetable is None else min(len(stop_sequence), len(timetable))
+            width = timetable.shape[1] if n_rows else 0
+            
+            # 정류장 수에 맞춰 행 맞춤 (시간표가 짧으면 TT_PAD 행)
+            block = np.full((len(stop_sequence), width), TT_PAD, dtype=np.int32)
+            block[:n_rows] = timetable[:n_rows]
+            
+            rs_stops.extend(self.stop_id_to_idx.get(stop_id, -1) for stop_id in stop_sequence)
+            self._rs_off[r + 1] = len(rs_stops)
+            self._tt_off[r] = tt_size
+            self._tt_width[r] = width
+            tt_blocks.append(block.ravel())
+            tt_size += block.size
+        
+        self._rs_stops = np.array(rs_stops, dtype=np.int32)
+        self._tt_data = (np.concatenate(tt_blocks) if tt_blocks
+                         else np.zeros(0, dtype=np.int32))
+    
+    @staticmethod
+    def _timetable_array(timetable) -> np.ndarray:
+        """정류장 순번별 시간 목록 → (정류장 순번, 열차) int32 배열 (빈 칸은 TT_PAD)"""
+        if isinstance(timetable, np.ndarray) and timetable.ndim == 2:
+            return timetable.astype(np.int32, copy=False)
+        
+        width = max((len(times) for times in timetable), default=0)
+        array = np.full((len(timetable), width), TT_PAD, dtype=np.int32)
+        for seq, times in enumerate(timetable):
+            array[seq, :len(times)] = times
+        return array
+    
+    def _build_transfer_csr(self):
+        """환승 그래프를 CSR 배열로 변환 (정류장 인덱스 기준, 미등록 정류장 제외)"""
+        n_stops = len(self.all_stops)
+        self._tr_indptr = np.zeros(n_stops + 1, dtype=np.int32)
+        indices = []
+        times = []
+        for stop_idx in range(n_stops):
+            for next_stop_id, transfer_time in self.all_transfers.get(self.stop_idx_to_id[stop_idx], ()):
+                next_idx = self.stop_id_to_idx.get(next_stop_id)
+                if next_idx is not None:
+                    indices.append(next_idx)
+                    times.append(transfer_time)
+            self._tr_indptr[stop_idx + 1] = len(indices)
+        
+        self._tr_indices = np.array(indices, dtype=np.int32)
+        self._tr_times = np.array(times, dtype=np.int32)
+    
     def _create_intermodal_transfers(self):
         """대중교통 ↔ 가상 정거장 환승 생성"""
         max_walk_dist = 300  # 300m
         
-        # 각 가상 정거장에서 가까운 대중교통 정류장 연결
-        for v_stop_id in self.virtual_stops.keys():
-            v_stop = self.all_stops[v_stop_id]
+        # 대중교통 정류장만 (type 0-4)
+        transit_ids = [stop_id for stop_id, stop in self.all_stops.items() if stop.stop_type < 5]
+        virtual_ids = list(self.virtual_stops.keys())
+        
+        # 각 가상 정거장에서 가까운 대중교통 정류장 검색 (반경 질의)
+        neighbors = _neighbors_within(
+            np.array([self.all_stops[s].stop_lat for s in transit_ids]),
+            np.array([self.all_stops[s].stop_lon for s in transit_ids]),
+            max_walk_dist,
+            np.array([self.all_stops[s].stop_lat for s in virtual_ids]),
+            np.array([self.all_stops[s].stop_lon for s in virtual_ids])
+        )
+        
+        for v_stop_id, (idx, dists) in zip(virtual_ids, neighbors):
+            # 정류장 순서대로 연결
+            order = np.argsort(idx)
+            walk_times = (dists[order] / 1.33).astype(int)  # 80m/분
             
-            # 주변 대중교통 정류장 검색
-            for t_stop_id, t_stop in self.all_stops.items():
-                # 대중교통 정류장만 (type 0-4)
-                if t_stop.stop_type >= 5:
-                    continue
-                
-                dist = self._haversine_distance(
-                    v_stop.stop_lat, v_stop.stop_lon,
-                    t_stop.stop_lat, t_stop.stop_lon
-                )
+            for t_pos, walk_time in zip(idx[order].tolist(), walk_times.tolist()):
+                t_stop_id = transit_ids[t_pos]
                 
-                if dist <= max_walk_dist:
-                    walk_time = int(dist / 1.33)  # 80m/분
-                    
-                    # 양방향 환승
-                    self.all_transfers[v_stop_id].append((t_stop_id, walk_time))
-                    self.all_transfers[t_stop_id].append((v_stop_id, walk_time))
+                # 양방향 환승
+                self.all_transfers[v_stop_id].append((t_stop_id, walk_time))
+                self.all_transfers[t_stop_id].append((v_stop_id, walk_time))
     
     def find_routes(self, origin: Tuple[float, float], 
                    destination: Tuple[float, float],
@@ -376,7 +725,63 @@ class OTPStyleMultimodalRAPTOR:
         journeys = self._run_integrated_raptor(
             origin_stops, dest_stops, dep_minutes, preference
         )
+        result_journeys = self._finalize_journeys(journeys, origin, destination, preference)
+        
+        elapsed = time.time() - start_time
+        logger.info(f"경로 탐색 완료: {len(result_journeys)}개 경로, "
+                   f"{elapsed:.2f}초")
+        
+        return result_journeys
+    
+    def find_routes_many(self, origins: List[Tuple[float, float]],
+                         destinations: List[Tuple[float, float]],
+                         departure_times: List[str],
+                         preference: RoutePreference = None) -> List[List[OTPJourney]]:
+        """여러 출발지-도착지 쌍 일괄 경로 탐색 (입력 순서대로 쌍별 상위 5개 경로)
+        
+        출발지와 출발 시간이 같은 쌍끼리는 RAPTOR를 한 번만 실행하고
+        도착지별로 결과를 추출 (find_routes와 같은 결과)
+        """
+        if preference is None:
+            preference = RoutePreference()
+        if not (len(origins) == len(destinations) == len(departure_times)):
+            raise ValueError("origins, destinations, departure_times 길이가 다름")
+        
+        start_time = time.time()
+        MAX_ROUNDS = preference.max_transfers + 1
         
+        # (출발지, 출발 시간)별 쌍 묶기
+        groups = defaultdict(list)
+        for i, (origin, departure_time) in enumerate(zip(origins, departure_times)):
+            groups[(tuple(origin), self._time_to_minutes(departure_time))].append(i)
+        
+        results = [[] for _ in origins]
+        for (origin, dep_minutes), pair_indices in groups.items():
+            origin_stops = self._find_nearest_stops(origin, preference.max_walk_distance)
+            if not origin_stops:
+                continue
+            
+            # 출발지 기준 RAPTOR 한 번
+            tau_round, parents = self._raptor_rounds(origin_stops, dep_minutes, MAX_ROUNDS)
+            
+            for i in pair_indices:
+                dest_stops = self._find_nearest_stops(destinations[i], preference.max_walk_distance)
+                if not dest_stops:
+                    continue
+                journeys = self._collect_journeys(tau_round, parents, dest_stops)
+                results[i] = self._finalize_journeys(journeys, origin, destinations[i], preference)
+        
+        elapsed = time.time() - start_time
+        logger.info(f"일괄 경로 탐색 완료: {len(origins)}개 쌍, "
+                   f"RAPTOR {len(groups)}회, {elapsed:.2f}초")
+        
+        return results
+    
+    def _finalize_journeys(self, journeys: List[Dict],
+                           origin: Tuple[float, float],
+                           destination: Tuple[float, float],
+                           preference: RoutePreference) -> List[OTPJourney]:
+        """RAPTOR 결과 → 여정 재구성, 점수 정렬 후 상위 5개"""
         # 경로 재구성
         result_journeys = []
         for journey_data in journeys:
@@ -390,10 +795,6 @@ class OTPStyleMultimodalRAPTOR:
         self._calculate_scores(result_journeys, preference)
         result_journeys.sort(key=lambda j: j.total_score, reverse=True)
         
-        elapsed = time.time() - start_time
-        logger.info(f"경로 탐색 완료: {len(result_journeys)}개 경로, "
-                   f"{elapsed:.2f}초")
-        
         return result_journeys[:5]  # 상위 5개
     
     def _run_integrated_raptor(self, origin_stops: List[Tuple[str, float]], 
@@ -402,115 +803,101 @@ class OTPStyleMultimodalRAPTOR:
                               preference: RoutePreference) -> List[Dict]:
         """통합 RAPTOR 알고리즘"""
         MAX_ROUNDS = preference.max_transfers + 1
+        tau_round, parents = self._raptor_rounds(origin_stops, dep_time, MAX_ROUNDS)
+        return self._collect_journeys(tau_round, parents, dest_stops)
+    
+    def _raptor_rounds(self, origin_stops: List[Tuple[str, float]],
+                       dep_time: int, MAX_ROUNDS: int) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        """RAPTOR 라운드 실행 - (라운드별 도착 시간 tau_round, 라운드별 부모 정보) 반환
+        
+        목적지와 무관하게 전체 정류장 탐색 - 노선당 첫 마크 정류장에서만 탑승하므로
+        목적지 기준 가지치기로 마크 집합이 바뀌면 결과가 달라짐
+        부모 정보는 쿼리마다 새로 할당 (여러 쿼리를 동시에 실행해도 안전)
+        """
         n_stops = len(self.all_stops)
         
         # 초기화
-        tau = np.full(n_stops, np.inf)  # 최단 도착 시간
-        tau_round = np.full((MAX_ROUNDS, n_stops), np.inf)
+        tau = np.full(n_stops, TAU_INF, dtype=np.int32)  # 최단 도착 시간 (분)
+        tau_round = np.full((MAX_ROUNDS, n_stops), TAU_INF, dtype=np.int32)
+        
+        # 부모 정보 (역추적용) - 이전 정류장 / 노선 인덱스(도보: PARENT_WALK) / 열차(도보: 환승 시간)
+        par_stop = np.full((MAX_ROUNDS, n_stops), -1, dtype=np.int32)
+        par_route = np.full((MAX_ROUNDS, n_stops), -1, dtype=np.int32)
+        par_trip = np.full((MAX_ROUNDS, n_stops), -1, dtype=np.int32)
         
-        # 부모 정보 (역추적용)
-        parent = [None] * n_stops
-        parent_round = [[None] * n_stops for _ in range(MAX_ROUNDS)]
+        # 마크된 정류장 비트마스크 (uint64 워드당 64개 정류장)
+        n_words = (n_stops + 63) // 64
+        marked = np.zeros(n_words, dtype=np.uint64)
+        new_marked = np.zeros(n_words, dtype=np.uint64)  # 노선 스캔으로 개선
+        transfer_marked = np.zeros(n_words, dtype=np.uint64)  # 환승으로 개선
+        new_order = np.empty(n_stops, dtype=np.int32)  # 노선 스캔으로 처음 마크된 순서
         
         # 출발 정류장 초기화
-        marked_stops = set()
         for stop_id, walk_time in origin_stops:
             if stop_id in self.stop_id_to_idx:
                 idx = self.stop_id_to_idx[stop_id]
                 arrival_time = dep_time + walk_time
                 tau[idx] = arrival_time
                 tau_round[0][idx] = arrival_time
-                marked_stops.add(idx)
+                _bit_set(marked, idx)
         
         # 라운드별 처리
         for round_k in range(MAX_ROUNDS):
-            if not marked_stops:
+            if not marked.any():
                 break
             
-            # 새로운 마크된 정류장
-            new_marked = set()
+            # 마크된 정거장을 지나는 노선만 수집 (노선 인덱스 순, 노선별 가장 앞선 정류장 순번)
+            route_idx, start_seqs = _collect_routes(
+                marked, self._sr_indptr, self._sr_routes, self._sr_seqs, self._route_start
+            )
             
-            # 모든 노선 스캔 (대중교통 + 가상)
-            for route_id in self.all_routes.keys():
-                earliest_trip = -1
-                boarding_stop = -1
-                
-                # 노선의 정류장 순서대로
-                stop_sequence = self.all_route_stops.get(route_id, [])
-                if not stop_sequence:
-                    continue
-                
-                timetable = self.all_timetables.get(route_id, [])
-                if not timetable:
-                    continue
-                
-                for seq, stop_id in enumerate(stop_sequence):
-                    if stop_id not in self.stop_id_to_idx:
-                        continue
-                        
-                    stop_idx = self.stop_id_to_idx[stop_id]
-                    
-                    # 탑승 가능 확인
-                    if stop_idx in marked_stops and earliest_trip == -1:
-                        if seq < len(timetable):
-                            departures = timetable[seq]
-                            # 다음 출발 찾기
-                            trip_idx = self._find_next_departure(
-                                departures, tau[stop_idx]
-                            )
-                            if trip_idx != -1:
-                                earliest_trip = trip_idx
-                                boarding_stop = stop_idx
-                    
-                    # 하차 및 개선
-                    elif earliest_trip != -1 and seq < len(timetable):
-                        # 시간표 인덱스 범위 확인
-                        if earliest_trip < len(timetable[seq]):
-                            arrival = timetable[seq][earliest_trip]
-                            
-                            if arrival < tau[stop_idx]:
-                                tau[stop_idx] = arrival
-                                tau_round[round_k][stop_idx] = arrival
-                                parent[stop_idx] = (
-                                    boarding_stop, route_id, earliest_trip
-                                )
-                                parent_round[round_k][stop_idx] = parent[stop_idx]
-                                new_marked.add(stop_idx)
+            # 수집된 노선만 스캔 (대중교통 + 가상)
+            new_marked.fill(0)
+            n_new = _scan_routes(
+                route_idx, start_seqs,
+                self._rs_off, self._rs_stops, self._tt_off, self._tt_width, self._tt_data,
+                marked, tau, tau_round[round_k],
+                par_stop[round_k], par_route[round_k], par_trip[round_k],
+                new_marked, new_order
+            )
             
-            # 환승 적용
-            marked_stops = new_marked.copy()
-            for stop_idx in new_marked:
-                stop_id = self.stop_idx_to_id[stop_idx]
-                
-                for next_stop_id, transfer_time in self.all_transfers[stop_id]:
-                    if next_stop_id not in self.stop_id_to_idx:
-                        continue
-                        
-                    next_idx = self.stop_id_to_idx[next_stop_id]
-                    new_arrival = tau[stop_idx] + transfer_time
-                    
-                    if new_arrival < tau[next_idx]:
-                        tau[next_idx] = new_arrival
-                        tau_round[round_k][next_idx] = new_arrival
-                        parent[next_idx] = (stop_idx, 'walk', transfer_time)
-                        parent_round[round_k][next_idx] = parent[next_idx]
-                        marked_stops.add(next_idx)
+            # 환승 적용 - 마크 순서대로 집합을 구성해 집합 순회 순서대로 완화
+            srcs = np.fromiter(set(new_order[:n_new].tolist()), dtype=np.int32, count=n_new)
+            transfer_marked.fill(0)
+            _relax_transfers(
+                srcs,
+                self._tr_indptr, self._tr_indices, self._tr_times,
+                tau, tau_round[round_k],
+                par_stop[round_k], par_route[round_k], par_trip[round_k],
+                transfer_marked
+            )
+            
+            # 다음 라운드 마크 = 노선 개선 ∪ 환승 개선 (버퍼 재사용)
+            np.bitwise_or(new_marked, transfer_marked, out=marked)
+        
+        return tau_round, (par_stop, par_route, par_trip)
+    
+    def _collect_journeys(self, tau_round: np.ndarray, parents: Tuple[np.ndarray, ...],
+                          dest_stops: List[Tuple[str, float]]) -> List[Dict]:
+        """도착지별 라운드별 경로 수집 (tau_round, parents는 _raptor_rounds 결과)"""
+        MAX_ROUNDS = len(tau_round)
+        par_stop, par_route, par_trip = parents
+        
+        dest_list = [(self.stop_id_to_idx[dest_stop_id], dest_stop_id, walk_time)
+                     for dest_stop_id, walk_time in dest_stops
+                     if dest_stop_id in self.stop_id_to_idx]
         
         # 도착지별 최적 경로 수집
         journeys = []
-        for dest_stop_id, walk_time in dest_stops:
-            if dest_stop_id not in self.stop_id_to_idx:
-                continue
-                
-            dest_idx = self.stop_id_to_idx[dest_stop_id]
-            
+        for dest_idx, dest_stop_id, walk_time in dest_list:
             for round_k in range(MAX_ROUNDS):
-                if tau_round[round_k][dest_idx] < np.inf:
+                if tau_round[round_k][dest_idx] < TAU_INF:
                     journey = {
                         'round': round_k,
-                        'arrival_time': tau_round[round_k][dest_idx] + walk_time,
+                        'arrival_time': int(tau_round[round_k][dest_idx]) + walk_time,
                         'dest_stop': dest_stop_id,
-                        'parent_info': parent_round[round_k]
+                        'parent_info': (par_stop[round_k], par_route[round_k],
+                                        par_trip[round_k])
                     }
                     journeys.append(journey)
         
@@ -521,36 +908,34 @@ class OTPStyleMultimodalRAPTOR:
                            destination: Tuple[float, float]) -> Optional[OTPJourney]:
         """여정 재구성"""
         dest_idx = self.stop_id_to_idx[journey_data['dest_stop']]
-        parent_info = journey_data['parent_info']
+        par_stop, par_route, par_trip = journey_data['parent_info']
         
         # 역추적
         path = []
         current_idx = dest_idx
         
-        while current_idx is not None and parent_info[current_idx] is not None:
-            parent_data = parent_info[current_idx]
+        while par_stop[current_idx] >= 0:
+            from_idx = int(par_stop[current_idx])
+            route_idx = int(par_route[current_idx])
             
-            if parent_data[1] == 'walk':
+            if route_idx == PARENT_WALK:
                 # 도보 구간
-                from_idx = parent_data[0]
                 path.append({
                     'type': 'walk',
                     'from_stop': self.stop_idx_to_id[from_idx],
                     'to_stop': self.stop_idx_to_id[current_idx],
-                    'time': parent_data[2]
+                    'time': int(par_trip[current_idx])
                 })
-                current_idx = from_idx
             else:
                 # 대중교통/킥보드 구간
-                boarding_idx, route_id, trip_idx = parent_data
                 path.append({
                     'type': 'transit',
-                    'route_id': route_id,
-                    'boarding_stop': self.stop_idx_to_id[boarding_idx],
+                    'route_id': self._route_ids[route_idx],
+                    'boarding_stop': self.stop_idx_to_id[from_idx],
                     'alighting_stop': self.stop_idx_to_id[current_idx],
-                    'trip_idx': trip_idx
+                    'trip_idx': int(par_trip[current_idx])
                 })
-                current_idx = boarding_idx
+            current_idx = from_idx
         
         if not path:
             return None
@@ -575,6 +960,7 @@ class OTPStyleMultimodalRAPTOR:
         journey.walk_distance += walk_dist
         
         # 중간 구간들
+        transit_paid = False  # 대중교통 기본요금 과금 여부
         for segment in path:
             if segment['type'] == 'walk':
                 from_stop = self.all_stops[segment['from_stop']]
@@ -635,12 +1021,10 @@ class OTPStyleMultimodalRAPTOR:
                 if mode in ['kickboard', 'bike']:
                     # 킥보드와 따릉이는 각각 독립적으로 과금
                     journey.total_cost += cost
-                elif mode in ['bus', 'subway'] and not any(
-                    leg.get('mode') in ['bus', 'subway'] 
-                    for leg in journey.legs[:-1]
-                ):
+                elif mode in ['bus', 'subway'] and not transit_paid:
                     # 대중교통은 첫 승차시만 과금
                     journey.total_cost += cost
+                    transit_paid = True
         
         # 마지막 정류장 → 도착지 도보
         last_stop_id = path[-1].get('to_stop') or path[-1].get('alighting_stop')
@@ -666,59 +1050,84 @@ class OTPStyleMultimodalRAPTOR:
     def _find_nearest_stops(self, location: Tuple[float, float], 
                            max_distance: float) -> List[Tuple[str, float]]:
         """가까운 정류장 찾기 (대중교통 + 가상)"""
-        nearby = []
+        lat, lon = location
         
-        for stop_id, stop in self.all_stops.items():
-            dist = self._haversine_distance(
-                location[0], location[1], stop.stop_lat, stop.stop_lon
-            )
-            
-            if dist <= max_distance:
-                walk_time = int(dist / 1.33)  # 80m/분
-                nearby.append((stop_id, walk_time))
+        # 격자 셀 후보 정거장만 정확한 거리 계산
+        candidates = self._nearest_candidates(lat, lon, max_distance)
+        dist = self._distances_to_stops(lat, lon, candidates)
         
-        # 거리순 정렬
-        nearby.sort(key=lambda x: x[1])
+        within_mask = dist <= max_distance
+        within = candidates[within_mask]
+        dist = dist[within_mask]
+        walk_times = (dist / 1.33).astype(np.int64)  # 80m/분
         
-        return nearby[:10]  # 최대 10개
+        # 거리순 정렬 (동일 시간은 정거장 순서 유지)
+        order = np.argsort(walk_times, kind='stable')[:10]  # 최대 10개
+        
+        return [(self._stop_ids[within[i]], int(walk_times[i])) for i in order]
     
-    def _find_next_departure(self, departures: List[int], 
-                           earliest_time: float) -> int:
-        """다음 출발 시간 찾기 (이진 탐색)"""
-        if not departures:
-            return -1
-            
-        left, right = 0, len(departures) - 1
-        result = -1
-        
-        while left <= right:
-            mid = (left + right) // 2
-            if departures[mid] >= earliest_time:
-                result = mid
-                right = mid - 1
-            else:
-                left = mid + 1
+    def _nearest_candidates(self, lat: float, lon: float,
+                            max_distance: float) -> np.ndarray:
+        """좌표 격자 셀(소수 3자리, 약 100m) 단위로 캐시한 후보 정거장 인덱스
+        
+        셀 중심에서 max_distance + 여유 반경 내 정거장이므로 셀 안의 어떤 좌표든
+        max_distance 이내 정거장을 모두 포함
+        """
+        key = (round(lat, 3), round(lon, 3), max_distance)
+        candidates = self._nearest_cache.get(key)
+        if candidates is not None:
+            self._nearest_cache.move_to_end(key)
+            return candidates
+        
+        radius = max_distance + NEAREST_CELL_MARGIN_M
+        if self._stop_tree is not None:
+            # 평면 근사 오차를 감안해 반경에 1% 여유 (정확한 거리는 호출 측에서 계산)
+            candidates = np.array(
+                sorted(self._stop_tree.query_ball_point(self._project(key[0], key[1]),
+                                                        r=radius * 1.01)),
+                dtype=np.int64
+            )
+        else:
+            dist = self._distances_to_stops(key[0], key[1])
+            candidates = np.flatnonzero(dist <= radius)
         
-        return result
+        self._nearest_cache[key] = candidates
+        if len(self._nearest_cache) > NEAREST_CACHE_SIZE:
+            self._nearest_cache.popitem(last=False)
+        return candidates
+    
+    def _distances_to_stops(self, lat: float, lon: float,
+                            stop_indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """좌표 → 정거장들 haversine 거리 (미터), stop_indices 미지정 시 전체 정거장"""
+        if stop_indices is None:
+            stop_indices = slice(None)
+        delta_phi = np.radians(self._stop_lats[stop_indices] - lat)
+        delta_lambda = np.radians(self._stop_lons[stop_indices] - lon)
+        a = (np.sin(delta_phi/2)**2 +
+             np.cos(np.radians(lat)) * self._stop_cos_lat[stop_indices] * np.sin(delta_lambda/2)**2)
+        return 2 * 6371000 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
     
     def _calculate_transit_time(self, route_id: str, from_stop: str, 
                                to_stop: str, trip_idx: int) -> int:
         """대중교통 소요시간 계산"""
-        stop_sequence = self.all_route_stops.get(route_id, [])
+        position = self.route_stop_position.get(route_id)
         timetable = self.all_timetables.get(route_id, [])
         
-        if not stop_sequence or not timetable:
+        if not position or len(timetable) == 0:
+            return 0
+        
+        from_idx = position.get(from_stop)
+        to_idx = position.get(to_stop)
+        if from_idx is None or to_idx is None:
             return 0
         
         try:
-            from_idx = stop_sequence.index(from_stop)
-            to_idx = stop_sequence.index(to_stop)
-            
             if from_idx < len(timetable) and to_idx < len(timetable):
-                departure = timetable[from_idx][trip_idx]
-                arrival = timetable[to_idx][trip_idx]
-                return arrival - departure
-        except (ValueError, IndexError):
+                departure = timetable[from_idx, trip_idx]
+                arrival = timetable[to_idx, trip_idx]
+                if departure != TT_PAD and arrival != TT_PAD:
+                    return int(arrival - departure)
+        except IndexError:
             pass
         
         return 0
@@ -769,23 +1178,13 @@ class OTPStyleMultimodalRAPTOR:
                 preference.cost_weight * journey.cost_score
             )
     
-    @staticmethod
-    def _haversine_distance(lat1: float, lon1: float, 
-                           lat2: float, lon2: float) -> float:
-        """두 지점 간 거리 (미터)"""
-        R = 6371000  # 지구 반경
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        delta_phi = np.radians(lat2 - lat1)
-        delta_lambda = np.radians(lon2 - lon1)
-        
-        a = np.sin(delta_phi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        
-        return R * c
+    # 두 지점 간 거리 (미터) - 모듈 수준 컴파일 함수 사용
+    _haversine_distance = staticmethod(_haversine_m)
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _time_to_minutes(time_str: str) -> int:
-        """시간 문자열을 분으로 변환"""
+        """시간 문자열을 분으로 변환 (하루 시각 수가 적으므로 결과 캐시)"""
         parts = time_str.split(':')
         return int(parts[0]) * 60 + int(parts[1])
     
@@ -10,17 +10,97 @@ from pathlib import Path
 import json
 from datetime import datetime
 
+# orjson은 선택적으로 import (없으면 표준 json 사용)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("⚠️ orjson 미설치 - 표준 json으로 저장")
+
+# PyArrow는 선택적으로 import (없으면 CSV로 저장)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("⚠️ pyarrow 미설치 - 주행 데이터를 CSV로 저장")
+
 # 강남구 경계
 GANGNAM_BOUNDS = {
     'min_lat': 37.460, 'max_lat': 37.550,
     'min_lon': 127.000, 'max_lon': 127.140
 }
 
+# 스윙 주행 데이터 시각 형식
+SWING_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# CSV 분할 읽기 단위 (행) - 전체 파일 대신 청크 단위로 필터링해 메모리 사용 제한
+CSV_CHUNK_SIZE = 500_000
+COORD_DTYPES = {'start_x': 'float64', 'start_y': 'float64',
+                'end_x': 'float64', 'end_y': 'float64'}
+
 def is_in_gangnam(lat, lon):
     """좌표가 강남구 내에 있는지 확인"""
     return (GANGNAM_BOUNDS['min_lat'] <= lat <= GANGNAM_BOUNDS['max_lat'] and
             GANGNAM_BOUNDS['min_lon'] <= lon <= GANGNAM_BOUNDS['max_lon'])
 
+def gangnam_mask(lats, lons):
+    """좌표 배열이 강남구 내에 있는지 벡터 연산으로 확인 (NaN은 False)"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    return (np.isfinite(lats) & np.isfinite(lons) &
+            (lats >= GANGNAM_BOUNDS['min_lat']) & (lats <= GANGNAM_BOUNDS['max_lat']) &
+            (lons >= GANGNAM_BOUNDS['min_lon']) & (lons <= GANGNAM_BOUNDS['max_lon']))
+
+def parse_start_hour(times: pd.Series) -> pd.Series:
+    """시작 시각 컬럼에서 시(hour) 추출 (형식 지정 파싱, 실패 시 형식 추론)"""
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return times.dt.hour
+    try:
+        parsed = pd.to_datetime(times, format=SWING_TIME_FORMAT, cache=True)
+    except ValueError:
+        parsed = pd.to_datetime(times, format='mixed', cache=True)
+    return parsed.dt.hour
+
+def count_grid_cells(lats, lons, grid_size):
+    """좌표를 격자 단위로 반올림해 격자별 개수 집계
+
+    (위도 격자, 경도 격자) 정수 쌍을 int64 키 하나로 묶어 np.unique로 한 번에 집계
+    """
+    lat_bin = np.rint(np.asarray(lats) / grid_size).astype(np.int64)
+    lon_bin = np.rint(np.asarray(lons) / grid_size).astype(np.int64)
+    keys = (lat_bin << 32) | (lon_bin & 0xFFFFFFFF)
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    
+    return pd.DataFrame({
+        'grid_lat': (unique_keys >> 32) * grid_size,
+        'grid_lon': (unique_keys & 0xFFFFFFFF).astype(np.uint32).astype(np.int32) * grid_size,
+        'count': counts
+    })
+
+def write_table(df: pd.DataFrame, path: Path) -> Path:
+    """표 저장 - pyarrow 사용 가능 시 Parquet(zstd), 없으면 CSV (확장자는 자동 지정)"""
+    if PYARROW_AVAILABLE:
+        path = path.with_suffix('.parquet')
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path,
+                       compression='zstd')
+    else:
+        path = path.with_suffix('.csv')
+        df.to_csv(path, index=False)
+    return path
+
+def write_json(path, data):
+    """JSON 저장 (UTF-8, 들여쓰기 2칸)"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 |
+                                 orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
 def extract_gangnam_pm_locations():
     """강남구 내 PM 위치 추출"""
     
@@ -33,35 +113,38 @@ def extract_gangnam_pm_locations():
         print(f"❌ 파일을 찾을 수 없습니다: {data_path}")
         return
     
-    # CSV 파일 읽기
+    # CSV 파일을 청크 단위로 읽으며 강남구 관련 주행만 남김
+    total_routes = 0
+    n_start_coords = 0
+    n_end_coords = 0
+    pieces = []
     try:
-        df = pd.read_csv(data_path)
-        print(f"✅ 총 {len(df):,}개의 주행 기록 로드")
+        for chunk in pd.read_csv(data_path, chunksize=CSV_CHUNK_SIZE, dtype=COORD_DTYPES):
+            total_routes += len(chunk)
+            n_start_coords += int(chunk['start_x'].notna().sum())
+            n_end_coords += int(chunk['end_x'].notna().sum())
+            
+            # 강남구 내 시작/종료 위치 필터링 (x가 위도, y가 경도)
+            chunk['start_in_gangnam'] = gangnam_mask(chunk['start_x'].to_numpy(),
+                                                     chunk['start_y'].to_numpy())
+            chunk['end_in_gangnam'] = gangnam_mask(chunk['end_x'].to_numpy(),
+                                                   chunk['end_y'].to_numpy())
+            
+            pieces.append(chunk[chunk['start_in_gangnam'] | chunk['end_in_gangnam']])
+        print(f"✅ 총 {total_routes:,}개의 주행 기록 로드")
     except Exception as e:
         print(f"❌ 파일 읽기 오류: {e}")
         return
     
     # 좌표 데이터 확인
     print("\n좌표 데이터 확인...")
-    print(f"시작 좌표: {df['start_x'].notna().sum():,}개")
-    print(f"종료 좌표: {df['end_x'].notna().sum():,}개")
-    
-    # 강남구 내 시작 위치 필터링 (x가 위도, y가 경도)
-    df['start_in_gangnam'] = df.apply(
-        lambda row: is_in_gangnam(row['start_x'], row['start_y']) 
-        if pd.notna(row['start_x']) and pd.notna(row['start_y']) else False, 
-        axis=1
-    )
-    
-    # 강남구 내 종료 위치 필터링 (x가 위도, y가 경도)
-    df['end_in_gangnam'] = df.apply(
-        lambda row: is_in_gangnam(row['end_x'], row['end_y'])
-        if pd.notna(row['end_x']) and pd.notna(row['end_y']) else False,
-        axis=1
-    )
-    
-    # 강남구 관련 주행만 필터링
-    gangnam_df = df[df['start_in_gangnam'] | df['end_in_gangnam']].copy()
+    print(f"시작 좌표: {n_start_coords:,}개")
+    print(f"종료 좌표: {n_end_coords:,}개")
+    
+    # 강남구 관련 주행
+    gangnam_df = pd.concat(pieces) if pieces else pd.DataFrame(
+        columns=['start_x', 'start_y', 'end_x', 'end_y', 'start_time',
+                 'start_in_gangnam', 'end_in_gangnam'])
     
     print(f"\n강남구 관련 주행: {len(gangnam_df):,}개")
     print(f"- 강남구에서 시작: {gangnam_df['start_in_gangnam'].sum():,}개")
@@ -70,7 +153,7 @@ def extract_gangnam_pm_locations():
     
     # 시간대별 분포
     if len(gangnam_df) > 0:
-        gangnam_df['hour'] = pd.to_datetime(gangnam_df['start_time']).dt.hour
+        gangnam_df['hour'] = parse_start_hour(gangnam_df['start_time'])
         hourly_dist = gangnam_df['hour'].value_counts().sort_index()
         
         print("\n시간대별 이용 분포:")
@@ -88,15 +171,15 @@ def extract_gangnam_pm_locations():
     
     # 격자 단위로 집계 (약 100m x 100m)
     grid_size = 0.001  # 약 100m
-    start_points['grid_lat'] = (start_points['start_x'] / grid_size).round() * grid_size
-    start_points['grid_lon'] = (start_points['start_y'] / grid_size).round() * grid_size
-    
-    # 격자별 카운트
-    grid_counts = start_points.groupby(['grid_lat', 'grid_lon']).size().reset_index(name='count')
-    grid_counts = grid_counts.sort_values('count', ascending=False)
+    grid_counts = count_grid_cells(start_points['start_x'].to_numpy(),
+                                   start_points['start_y'].to_numpy(), grid_size)
+    # 개수 내림차순 정렬 (동률은 격자 좌표순) 후 상위 100개
+    order = np.lexsort((np.arange(len(grid_counts)), -grid_counts['count'].to_numpy()))
+    grid_counts = grid_counts.iloc[order]
+    top_grids = grid_counts.head(100)
     
     print(f"\n상위 20개 PM 밀집 지역:")
-    for idx, row in grid_counts.head(20).iterrows():
+    for idx, row in top_grids.head(20).iterrows():
         print(f"{idx+1}. 위도 {row['grid_lat']:.4f}, 경도 {row['grid_lon']:.4f} - {row['count']:,}개 주행")
     
     # 결과 저장
@@ -104,17 +187,17 @@ def extract_gangnam_pm_locations():
     output_dir.mkdir(exist_ok=True)
     
     # 1. 강남구 PM 주행 데이터
-    gangnam_df.to_csv(output_dir / "gangnam_swing_routes_20230510.csv", index=False)
-    print(f"\n✅ 강남구 PM 주행 데이터 저장: {output_dir}/gangnam_swing_routes_20230510.csv")
+    routes_path = write_table(gangnam_df, output_dir / "gangnam_swing_routes_20230510")
+    print(f"\n✅ 강남구 PM 주행 데이터 저장: {routes_path}")
     
-    # 2. PM 밀집 지역 데이터
+    # 2. PM 밀집 지역 데이터 (개수 내림차순)
     grid_counts.to_csv(output_dir / "gangnam_pm_hotspots.csv", index=False)
     print(f"✅ PM 밀집 지역 데이터 저장: {output_dir}/gangnam_pm_hotspots.csv")
     
     # 3. 통계 요약
     stats = {
         'date': '2023-05-10',
-        'total_routes': len(df),
+        'total_routes': total_routes,
         'gangnam_routes': len(gangnam_df),
         'start_in_gangnam': int(gangnam_df['start_in_gangnam'].sum()),
         'end_in_gangnam': int(gangnam_df['end_in_gangnam'].sum()),
@@ -125,35 +208,30 @@ def extract_gangnam_pm_locations():
         'bounds': GANGNAM_BOUNDS
     }
     
-    with open(output_dir / "gangnam_pm_stats.json", 'w', encoding='utf-8') as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    write_json(output_dir / "gangnam_pm_stats.json", stats)
     print(f"✅ 통계 요약 저장: {output_dir}/gangnam_pm_stats.json")
     
     # 4. 모빌리티 위치 데이터 (PART1_2.py와 호환)
     print("\n모빌리티 위치 데이터 생성 중...")
     
     # 상위 100개 밀집 지역을 킥보드 위치로 사용
-    mobility_locations = []
+    # 밀집도에 따라 킥보드 수 결정 (최대 10대)
+    n_vehicles = np.clip(top_grids['count'].to_numpy() // 10, 1, 10)
+    total_vehicles = int(n_vehicles.sum())
     
-    for idx, row in grid_counts.head(100).iterrows():
-        # 밀집도에 따라 킥보드 수 결정 (최대 10대)
-        n_vehicles = min(10, max(1, int(row['count'] / 10)))
-        
-        for i in range(n_vehicles):
-            # 격자 내에서 약간의 랜덤 오프셋 추가
-            offset_x = np.random.uniform(-grid_size/2, grid_size/2)
-            offset_y = np.random.uniform(-grid_size/2, grid_size/2)
-            
-            mobility_locations.append({
-                'type': 'kickboard',
-                'lat': row['grid_lat'] + offset_y,
-                'lon': row['grid_lon'] + offset_x,
-                'battery': np.random.uniform(20, 100),  # 20-100% 배터리
-                'provider': 'swing'
-            })
+    # 격자 내에서 약간의 랜덤 오프셋 추가 (전체 차량분을 한 번에 생성)
+    offset_x = np.random.uniform(-grid_size/2, grid_size/2, total_vehicles)
+    offset_y = np.random.uniform(-grid_size/2, grid_size/2, total_vehicles)
+    battery = np.random.uniform(20, 100, total_vehicles)  # 20-100% 배터리
     
     # 모빌리티 위치 저장
-    mobility_df = pd.DataFrame(mobility_locations)
+    mobility_df = pd.DataFrame({
+        'type': 'kickboard',
+        'lat': np.repeat(top_grids['grid_lat'].to_numpy(), n_vehicles) + offset_y,
+        'lon': np.repeat(top_grids['grid_lon'].to_numpy(), n_vehicles) + offset_x,
+        'battery': battery,
+        'provider': 'swing'
+    })
     mobility_df.to_csv(output_dir / "gangnam_kickboard_locations.csv", index=False)
     print(f"✅ 킥보드 위치 데이터 저장: {output_dir}/gangnam_kickboard_locations.csv ({len(mobility_df)}개)")
     
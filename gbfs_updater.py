@@ -6,21 +6,133 @@ GBFS 데이터 수집기
 """
 
 import json
+import math
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, NamedTuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 import threading
+import asyncio
 import time
 import logging
 from collections import defaultdict
 
+# Numba는 선택적으로 import (없으면 NumPy 벡터 연산으로 동작)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba 미설치 시 함수를 그대로 반환하는 대체 데코레이터"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_M = 6371000  # 지구 반경 (미터)
+GRID_CELL_DEG = 0.005  # 근접 검색 격자 크기 (위도 약 550m)
+METERS_PER_DEGREE = math.radians(1) * EARTH_RADIUS_M  # 위도 1도당 거리 (미터)
+PLANAR_MARGIN = 1.01  # 평면 근사 사전 필터 반경 여유 (하버사인 대비 오차 흡수)
+
+def planar_within(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray,
+                  radius_m: float) -> np.ndarray:
+    """국지 평면 근사(등장방형)로 반경 내 여부 판정 - 삼각함수 없이 곱셈/덧셈만 사용"""
+    m_lon = METERS_PER_DEGREE * math.cos(math.radians(lat))
+    dy = (lats - lat) * METERS_PER_DEGREE
+    dx = (lons - lon) * m_lon
+    return dx * dx + dy * dy <= radius_m * radius_m
+
+def build_grid_index(lats: np.ndarray, lons: np.ndarray,
+                     cell_deg: float = GRID_CELL_DEG) -> Dict[Tuple[int, int], np.ndarray]:
+    """위경도 격자 셀 -> 셀에 속한 인덱스 배열 (오름차순)"""
+    if len(lats) == 0:
+        return {}
+    cell_lat = np.floor(lats / cell_deg).astype(np.int64)
+    cell_lon = np.floor(lons / cell_deg).astype(np.int64)
+    order = np.lexsort((cell_lon, cell_lat))
+    keys = np.stack([cell_lat[order], cell_lon[order]], axis=1)
+    starts = np.flatnonzero(np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)])
+    groups = np.split(order, starts[1:])
+    return {(int(keys[st, 0]), int(keys[st, 1])): g for st, g in zip(starts, groups)}
+
+def grid_candidates(grid: Dict[Tuple[int, int], np.ndarray], lat: float, lon: float,
+                    radius_m: float, cell_deg: float = GRID_CELL_DEG) -> np.ndarray:
+    """반경 내에 들 수 있는 격자 셀들의 인덱스 (오름차순)"""
+    # 경도 방향 셀 폭은 위도에 따라 줄어들므로 반경을 덮는 셀 수를 축별로 계산
+    # (반경 끝의 고위도 쪽 cos 값 사용, 여유 0.1%)
+    radius_deg = math.degrees(radius_m * 1.001 / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(min(abs(lat) + radius_deg, 89.9))), 1e-6)
+    n_lat = int(math.ceil(radius_deg / cell_deg))
+    n_lon = int(math.ceil(radius_deg / (cell_deg * cos_lat)))
+    c_lat = int(math.floor(lat / cell_deg))
+    c_lon = int(math.floor(lon / cell_deg))
+
+    parts = []
+    for i in range(c_lat - n_lat, c_lat + n_lat + 1):
+        for j in range(c_lon - n_lon, c_lon + n_lon + 1):
+            cell = grid.get((i, j))
+            if cell is not None:
+                parts.append(cell)
+
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(parts))
+
+@njit(cache=True, fastmath=True)
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """두 지점 간 거리 (미터)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+    
+    a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    
+    return EARTH_RADIUS_M * c
+
+def trig_table(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """좌표 배열의 (sin φ, cos φ, sin λ, cos λ) 사전 계산 -> (4, N)"""
+    phi, lam = np.radians(lats), np.radians(lons)
+    return np.stack([np.sin(phi), np.cos(phi), np.sin(lam), np.cos(lam)])
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _haversine_trig_jit(sin_phi, cos_phi, sin_lam, cos_lam, trig):
+    """사전 계산된 삼각함수 테이블 기반 거리 (Numba 병렬 커널)"""
+    n = trig.shape[1]
+    out = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        # sin²(Δ/2) = (1 - cos Δ) / 2, cos Δ = cos a cos b + sin a sin b
+        cos_dphi = cos_phi * trig[1, i] + sin_phi * trig[0, i]
+        cos_dlam = cos_lam * trig[3, i] + sin_lam * trig[2, i]
+        a = 0.5 * (1 - cos_dphi) + cos_phi * trig[1, i] * 0.5 * (1 - cos_dlam)
+        a = min(max(a, 0.0), 1.0)
+        out[i] = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+    return out
+
+def _haversine_trig_np(sin_phi, cos_phi, sin_lam, cos_lam, trig):
+    """사전 계산된 삼각함수 테이블 기반 거리 (NumPy)"""
+    cos_dphi = cos_phi * trig[1] + sin_phi * trig[0]
+    cos_dlam = cos_lam * trig[3] + sin_lam * trig[2]
+    a = 0.5 * (1 - cos_dphi) + cos_phi * trig[1] * 0.5 * (1 - cos_dlam)
+    a = np.clip(a, 0.0, 1.0)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def haversine_trig(lat: float, lon: float, trig: np.ndarray) -> np.ndarray:
+    """한 지점과 trig_table 좌표들 간 거리 (미터) - 질의 지점의 삼각함수만 계산"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    args = (math.sin(phi), math.cos(phi), math.sin(lam), math.cos(lam), trig)
+    if NUMBA_AVAILABLE:
+        return _haversine_trig_jit(*args)
+    return _haversine_trig_np(*args)
+
 @dataclass
 class BikeStation:
     """따릉이 정거장 정보"""
@@ -45,23 +157,80 @@ class SharedVehicle:
     is_available: bool = True
     last_reported: datetime = field(default_factory=datetime.now)
 
+class GBFSSnapshot(NamedTuple):
+    """특정 시점의 GBFS 상태 (발행 후 배열은 수정되지 않음)"""
+    timestamp: float  # 발행 시각 (epoch 초)
+    station_ids: List[str]
+    station_names: np.ndarray
+    station_lat: np.ndarray
+    station_lon: np.ndarray
+    station_bikes: np.ndarray
+    station_docks: np.ndarray
+    station_active: np.ndarray
+    vehicle_ids: List[str]
+    vehicle_lat: np.ndarray
+    vehicle_lon: np.ndarray
+    vehicle_battery: np.ndarray
+    vehicle_provider: np.ndarray
+    vehicle_available: np.ndarray
+
 class GBFSUpdater:
-    """GBFS 스타일 데이터 업데이터"""
+    """GBFS 스타일 데이터 업데이터
+    
+    정거장/차량 상태는 필드별 NumPy 배열(SoA)로 저장하고,
+    BikeStation / SharedVehicle 데이터클래스는 조회 시 생성되는 읽기 전용 뷰로만 사용
+    """
     
-    def __init__(self, config_path: str = 'config/gbfs_config.json'):
-        """초기화"""
+    def __init__(self, config_path: str = 'config/gbfs_config.json',
+                 seed: Optional[int] = None):
+        """초기화 (seed: 초기 상태/상태 시뮬레이션 난수 시드, None이면 비결정적)"""
         self.config_path = Path(config_path)
         self.config = self._load_config()
         
-        # 데이터 저장소
-        self.bike_stations: Dict[str, BikeStation] = {}
-        self.shared_vehicles: Dict[str, SharedVehicle] = {}
+        # 따릉이 정거장 상태 (인덱스 i = i번째 정거장)
+        self.station_ids: List[str] = []
+        self.station_names = np.empty(0, dtype=object)
+        self.station_lat = np.empty(0, dtype=np.float64)
+        self.station_lon = np.empty(0, dtype=np.float64)
+        self.station_capacity = np.empty(0, dtype=np.int64)
+        self.station_bikes = np.empty(0, dtype=np.int64)
+        self.station_docks = np.empty(0, dtype=np.int64)
+        self.station_active = np.empty(0, dtype=bool)
+        self.station_last_reported = np.empty(0, dtype=np.float64)  # epoch 초
+        self._station_index: Dict[str, int] = {}
+        self._station_grid: Dict[Tuple[int, int], np.ndarray] = {}
+        self._station_trig = np.empty((4, 0), dtype=np.float64)
+        self._station_rentable = np.empty(0, dtype=bool)  # 운영 중 & 자전거 있음
+        
+        # 공유 킥보드 상태 (인덱스 i = i번째 차량)
+        self.vehicle_ids: List[str] = []
+        self.vehicle_lat = np.empty(0, dtype=np.float64)
+        self.vehicle_lon = np.empty(0, dtype=np.float64)
+        self.vehicle_battery = np.empty(0, dtype=np.float64)
+        self.vehicle_provider = np.empty(0, dtype=object)
+        self.vehicle_available = np.empty(0, dtype=bool)
+        self.vehicle_last_reported = np.empty(0, dtype=np.float64)  # epoch 초
+        self._vehicle_index: Dict[str, int] = {}
+        self._vehicle_grid: Dict[Tuple[int, int], np.ndarray] = {}
+        self._vehicle_trig = np.empty((4, 0), dtype=np.float64)
+        self._vehicle_rentable = np.empty(0, dtype=bool)  # 이용 가능 & 배터리 20% 이상
+        
+        # 초기 상태/상태 시뮬레이션용 난수 생성기 (PCG64, 필드별로 한 번에 생성)
+        self._rng = np.random.default_rng(seed)
         
         # 캐싱
         self._last_update = {}
         self._update_lock = threading.Lock()
         self._running = False
         self._update_thread = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._update_interval = self._parse_interval(self.config.get('update_frequency', '60s'))
+        
+        # 읽기용 스냅샷 - 갱신 시 배열을 새로 만들어 참조만 교체 (읽기는 락 불필요)
+        self._snapshot: GBFSSnapshot = None
+        with self._update_lock:
+            self._publish_snapshot()
         
         # 초기 데이터 로드
         self._initial_load()
@@ -81,29 +250,69 @@ class GBFSUpdater:
             elif provider_config['name'] == 'swing':
                 self._load_shared_vehicles(provider_config)
         
-        logger.info(f"로드 완료: {len(self.bike_stations)} 따릉이 정거장, "
-                   f"{len(self.shared_vehicles)} 스윙 킥보드")
+        logger.info(f"로드 완료: {len(self.station_ids)} 따릉이 정거장, "
+                   f"{len(self.vehicle_ids)} 스윙 킥보드")
+    
+    def _set_bike_stations(self, ids: List[str], names, lats, lons,
+                           capacity, bikes, docks):
+        """정거장 필드별 배열 저장"""
+        n = len(ids)
+        with self._update_lock:
+            self.station_ids = list(ids)
+            self.station_names = np.asarray(names, dtype=object)
+            self.station_lat = np.asarray(lats, dtype=np.float64)
+            self.station_lon = np.asarray(lons, dtype=np.float64)
+            self.station_capacity = np.asarray(capacity, dtype=np.int64)
+            self.station_bikes = np.asarray(bikes, dtype=np.int64)
+            self.station_docks = np.asarray(docks, dtype=np.int64)
+            self.station_active = np.ones(n, dtype=bool)
+            self.station_last_reported = np.full(n, time.time(), dtype=np.float64)
+            self._station_index = {sid: i for i, sid in enumerate(self.station_ids)}
+            self._station_grid = build_grid_index(self.station_lat, self.station_lon)
+            self._station_trig = trig_table(self.station_lat, self.station_lon)
+            self._station_rentable = self.station_active & (self.station_bikes > 0)
+            self._publish_snapshot()
+    
+    def _set_shared_vehicles(self, ids: List[str], lats, lons, battery,
+                             provider, available):
+        """차량 필드별 배열 저장"""
+        n = len(ids)
+        with self._update_lock:
+            self.vehicle_ids = list(ids)
+            self.vehicle_lat = np.asarray(lats, dtype=np.float64)
+            self.vehicle_lon = np.asarray(lons, dtype=np.float64)
+            self.vehicle_battery = np.asarray(battery, dtype=np.float64)
+            self.vehicle_provider = np.asarray(provider, dtype=object)
+            self.vehicle_available = np.asarray(available, dtype=bool)
+            self.vehicle_last_reported = np.full(n, time.time(), dtype=np.float64)
+            self._vehicle_index = {vid: i for i, vid in enumerate(self.vehicle_ids)}
+            self._vehicle_grid = build_grid_index(self.vehicle_lat, self.vehicle_lon)
+            self._vehicle_trig = trig_table(self.vehicle_lat, self.vehicle_lon)
+            self._vehicle_rentable = self.vehicle_available & (self.vehicle_battery >= 20)
+            self._publish_snapshot()
     
     def _load_bike_stations(self, config: Dict):
         """따릉이 정거장 데이터 로드"""
         try:
             # 실제로는 API에서 가져와야 하지만, 현재는 CSV 파일 사용
             df = pd.read_csv(config['data_source'])
+            df['station_id'] = 'BIKE_' + df['station_id'].astype(str)
+            df = df.drop_duplicates('station_id', keep='last')  # 중복 ID는 마지막 값 사용
+            n = len(df)
+            
+            # 없는 컬럼은 기본값 (용량 20, 자전거/거치대 수는 랜덤)
+            capacity = (df['capacity'].to_numpy() if 'capacity' in df
+                        else np.full(n, 20))
+            bikes = (df['bikes_available'].to_numpy() if 'bikes_available' in df
+                     else self._rng.integers(0, 15, size=n))
+            docks = (df['docks_available'].to_numpy() if 'docks_available' in df
+                     else self._rng.integers(0, 10, size=n))
             
-            for _, row in df.iterrows():
-                station = BikeStation(
-                    station_id=f"BIKE_{row['station_id']}",
-                    name=row['station_name'],
-                    lat=row['lat'],
-                    lon=row['lon'],
-                    capacity=int(row.get('capacity', 20)),
-                    bikes_available=int(row.get('bikes_available', 
-                                              np.random.randint(0, 15))),
-                    docks_available=int(row.get('docks_available', 
-                                              np.random.randint(0, 10)))
-                )
-                self.bike_stations[station.station_id] = station
-                
+            self._set_bike_stations(
+                df['station_id'].tolist(), df['station_name'].to_numpy(),
+                df['lat'].to_numpy(), df['lon'].to_numpy(),
+                capacity.astype(np.int64), bikes.astype(np.int64), docks.astype(np.int64))
+        
         except FileNotFoundError:
             logger.warning("따릉이 데이터 파일 없음, 샘플 데이터 생성")
             self._generate_sample_bike_stations()
@@ -123,165 +332,273 @@ class GBFSUpdater:
             ("BIKE_010", "도곡역 4번출구", 37.4910, 127.0553, 20),
         ]
         
-        for station_id, name, lat, lon, capacity in sample_stations:
-            bikes_available = np.random.randint(0, capacity)
-            self.bike_stations[station_id] = BikeStation(
-                station_id=station_id,
-                name=name,
-                lat=lat,
-                lon=lon,
-                capacity=capacity,
-                bikes_available=bikes_available,
-                docks_available=capacity - bikes_available
-            )
+        ids, names, lats, lons, capacity = zip(*sample_stations)
+        capacity = np.array(capacity, dtype=np.int64)
+        bikes = self._rng.integers(0, capacity)
+        self._set_bike_stations(ids, names, lats, lons,
+                                capacity, bikes, capacity - bikes)
     
     def _load_shared_vehicles(self, config: Dict):
         """스윙 킥보드 데이터 로드"""
         try:
             df = pd.read_csv(config['data_source'])
             
-            for idx, row in df.iterrows():
-                vehicle = SharedVehicle(
-                    vehicle_id=f"KICK_{idx:04d}",
-                    lat=row['lat'],
-                    lon=row['lon'],
-                    battery=row['battery'],
-                    provider=row['provider'],
-                    is_available=row.get('available', True)
-                )
-                self.shared_vehicles[vehicle.vehicle_id] = vehicle
-                
+            available = (df['available'].to_numpy() if 'available' in df
+                         else np.ones(len(df), dtype=bool))
+            self._set_shared_vehicles(
+                [f"KICK_{idx:04d}" for idx in df.index],
+                df['lat'].to_numpy(), df['lon'].to_numpy(),
+                df['battery'].to_numpy(), df['provider'].to_numpy(), available)
+        
         except Exception as e:
             logger.error(f"스윙 데이터 로드 실패: {e}")
     
+    def _station_view(self, i: int) -> BikeStation:
+        """i번째 정거장의 읽기 전용 뷰"""
+        return BikeStation(
+            station_id=self.station_ids[i],
+            name=self.station_names[i],
+            lat=float(self.station_lat[i]),
+            lon=float(self.station_lon[i]),
+            capacity=int(self.station_capacity[i]),
+            bikes_available=int(self.station_bikes[i]),
+            docks_available=int(self.station_docks[i]),
+            is_active=bool(self.station_active[i]),
+            last_reported=datetime.fromtimestamp(self.station_last_reported[i])
+        )
+    
+    def _vehicle_view(self, i: int) -> SharedVehicle:
+        """i번째 차량의 읽기 전용 뷰"""
+        return SharedVehicle(
+            vehicle_id=self.vehicle_ids[i],
+            lat=float(self.vehicle_lat[i]),
+            lon=float(self.vehicle_lon[i]),
+            battery=float(self.vehicle_battery[i]),
+            provider=self.vehicle_provider[i],
+            is_available=bool(self.vehicle_available[i]),
+            last_reported=datetime.fromtimestamp(self.vehicle_last_reported[i])
+        )
+    
+    def get_station(self, station_id: str) -> Optional[BikeStation]:
+        """정거장 조회"""
+        i = self._station_index.get(station_id)
+        return None if i is None else self._station_view(i)
+    
+    def get_vehicle(self, vehicle_id: str) -> Optional[SharedVehicle]:
+        """차량 조회"""
+        i = self._vehicle_index.get(vehicle_id)
+        return None if i is None else self._vehicle_view(i)
+    
+    @property
+    def bike_stations(self) -> Dict[str, BikeStation]:
+        """전체 정거장 (조회 시점 스냅샷)"""
+        return {sid: self._station_view(i) for i, sid in enumerate(self.station_ids)}
+    
+    @property
+    def shared_vehicles(self) -> Dict[str, SharedVehicle]:
+        """전체 차량 (조회 시점 스냅샷)"""
+        return {vid: self._vehicle_view(i) for i, vid in enumerate(self.vehicle_ids)}
+    
+    def _publish_snapshot(self):
+        """현재 배열들로 스냅샷 발행 (_update_lock 보유 상태에서 호출)
+        
+        배열은 제자리 수정 없이 항상 새로 만들어 교체하므로 참조만 묶으면 됨
+        """
+        self._snapshot = GBFSSnapshot(
+            timestamp=time.time(),
+            station_ids=self.station_ids,
+            station_names=self.station_names,
+            station_lat=self.station_lat,
+            station_lon=self.station_lon,
+            station_bikes=self.station_bikes,
+            station_docks=self.station_docks,
+            station_active=self.station_active,
+            vehicle_ids=self.vehicle_ids,
+            vehicle_lat=self.vehicle_lat,
+            vehicle_lon=self.vehicle_lon,
+            vehicle_battery=self.vehicle_battery,
+            vehicle_provider=self.vehicle_provider,
+            vehicle_available=self.vehicle_available
+        )
+    
+    def get_snapshot(self) -> GBFSSnapshot:
+        """최신 스냅샷 반환 (락 없이 참조만 읽음)"""
+        return self._snapshot
+    
     def get_current_data(self) -> Dict[str, Any]:
-        """현재 데이터 반환 (thread-safe)"""
-        with self._update_lock:
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'bike_stations': {
-                    k: {
-                        'station_id': v.station_id,
-                        'name': v.name,
-                        'lat': v.lat,
-                        'lon': v.lon,
-                        'bikes_available': v.bikes_available,
-                        'docks_available': v.docks_available,
-                        'is_active': v.is_active
-                    } for k, v in self.bike_stations.items()
-                },
-                'shared_vehicles': {
-                    k: {
-                        'vehicle_id': v.vehicle_id,
-                        'lat': v.lat,
-                        'lon': v.lon,
-                        'battery': v.battery,
-                        'provider': v.provider,
-                        'is_available': v.is_available
-                    } for k, v in self.shared_vehicles.items()
-                    if v.is_available and v.battery > 20  # 배터리 20% 이상만
-                }
+        """현재 데이터를 dict로 반환 (스냅샷 기반, thread-safe)"""
+        snap = self._snapshot
+        vehicle_idx = np.flatnonzero(
+            snap.vehicle_available & (snap.vehicle_battery > 20))  # 배터리 20% 이상만
+        return {
+            'timestamp': datetime.fromtimestamp(snap.timestamp).isoformat(),
+            'bike_stations': {
+                sid: {
+                    'station_id': sid,
+                    'name': name,
+                    'lat': lat,
+                    'lon': lon,
+                    'bikes_available': bikes,
+                    'docks_available': docks,
+                    'is_active': active
+                } for sid, name, lat, lon, bikes, docks, active in zip(
+                    snap.station_ids, snap.station_names,
+                    snap.station_lat.tolist(), snap.station_lon.tolist(),
+                    snap.station_bikes.tolist(), snap.station_docks.tolist(),
+                    snap.station_active.tolist())
+            },
+            'shared_vehicles': {
+                snap.vehicle_ids[i]: {
+                    'vehicle_id': snap.vehicle_ids[i],
+                    'lat': lat,
+                    'lon': lon,
+                    'battery': battery,
+                    'provider': provider,
+                    'is_available': True
+                } for i, lat, lon, battery, provider in zip(
+                    vehicle_idx.tolist(),
+                    snap.vehicle_lat[vehicle_idx].tolist(),
+                    snap.vehicle_lon[vehicle_idx].tolist(),
+                    snap.vehicle_battery[vehicle_idx].tolist(),
+                    snap.vehicle_provider[vehicle_idx])
             }
+        }
+    
+    @staticmethod
+    def _parse_interval(value) -> float:
+        """갱신 주기 설정 ("60s", "5m" 또는 초 단위 숫자) -> 초"""
+        if isinstance(value, (int, float)):
+            return float(value)
+        value = str(value).strip().lower()
+        if value.endswith('m'):
+            return float(value[:-1]) * 60
+        return float(value.rstrip('s'))
     
     def start(self):
-        """백그라운드 업데이트 시작"""
+        """백그라운드 업데이트 시작 (전용 스레드에서 asyncio 이벤트 루프 실행)"""
         if self._running:
             logger.warning("이미 실행 중")
             return
         
         self._running = True
-        self._update_thread = threading.Thread(target=self._update_loop)
+        self._loop = asyncio.new_event_loop()
+        self._stop_event = asyncio.Event()
+        self._update_thread = threading.Thread(target=self._run_event_loop)
         self._update_thread.daemon = True
         self._update_thread.start()
         logger.info("GBFS 업데이터 시작")
     
     def stop(self):
-        """업데이트 중지"""
+        """업데이트 중지 (대기 중인 주기를 즉시 깨움)"""
         self._running = False
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop_event.set)
         if self._update_thread:
             self._update_thread.join()
         logger.info("GBFS 업데이터 중지")
     
-    def _update_loop(self):
-        """주기적 업데이트 루프"""
+    def _run_event_loop(self):
+        """업데이트 스레드 진입점"""
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._update_loop())
+        finally:
+            self._loop.close()
+    
+    async def _update_loop(self):
+        """주기적 업데이트 루프
+        
+        다음 갱신 시각을 고정 간격으로 누적해 업데이트 소요 시간만큼 주기가 밀리지 않게 함
+        (처리가 주기보다 길어져 밀린 주기는 건너뜀)
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
         while self._running:
             try:
-                self._simulate_updates()
-                time.sleep(60)  # 1분마다 업데이트
+                await self._update_once()
+                next_tick += self._update_interval
+                if next_tick < loop.time():
+                    next_tick = loop.time()
             except Exception as e:
                 logger.error(f"업데이트 오류: {e}")
-                time.sleep(5)
+                next_tick = loop.time() + 5
+            
+            try:
+                await asyncio.wait_for(self._stop_event.wait(),
+                                       timeout=max(0.0, next_tick - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _update_once(self):
+        """한 주기 갱신 (실제 API 연동 시 피드 요청을 여기서 asyncio.gather로 동시 수행)"""
+        self._simulate_updates()
     
     def _simulate_updates(self):
         """실시간 데이터 시뮬레이션 (실제로는 API 호출)"""
         with self._update_lock:
-            # 따릉이 정거장 상태 업데이트
-            for station in self.bike_stations.values():
-                # 랜덤하게 자전거 수 변경
-                change = np.random.randint(-2, 3)
-                station.bikes_available = max(0, 
-                    min(station.capacity, station.bikes_available + change))
-                station.docks_available = station.capacity - station.bikes_available
-                station.last_reported = datetime.now()
+            now = time.time()
+            
+            # 따릉이 정거장 상태 업데이트 - 랜덤하게 자전거 수 변경
+            n_stations = len(self.station_ids)
+            changes = self._rng.integers(-2, 3, size=n_stations)
+            self.station_bikes = np.clip(self.station_bikes + changes, 0, self.station_capacity)
+            self._station_rentable = self.station_active & (self.station_bikes > 0)
+            self.station_docks = self.station_capacity - self.station_bikes
+            self.station_last_reported = np.full(n_stations, now, dtype=np.float64)
             
             # 스윙 킥보드 위치/상태 업데이트
-            for vehicle in self.shared_vehicles.values():
-                # 10% 확률로 사용 상태 변경
-                if np.random.random() < 0.1:
-                    vehicle.is_available = not vehicle.is_available
-                
-                # 사용 중이면 위치 이동 (약간)
-                if not vehicle.is_available:
-                    vehicle.lat += np.random.uniform(-0.001, 0.001)
-                    vehicle.lon += np.random.uniform(-0.001, 0.001)
-                    vehicle.battery -= np.random.uniform(0, 2)
-                    vehicle.battery = max(0, vehicle.battery)
-                
-                vehicle.last_reported = datetime.now()
-    
-    def get_stations_near(self, lat: float, lon: float, 
+            n_vehicles = len(self.vehicle_ids)
+            
+            # 10% 확률로 사용 상태 변경
+            flip = self._rng.random(n_vehicles) < 0.1
+            self.vehicle_available = self.vehicle_available ^ flip
+            
+            # 사용 중이면 위치 이동 (약간) - 이동 차량 수만큼만 난수 생성
+            # (스냅샷이 이전 배열을 참조하므로 복사본을 수정 후 교체)
+            moving = np.flatnonzero(~self.vehicle_available)
+            n_moving = len(moving)
+            lat, lon = self.vehicle_lat.copy(), self.vehicle_lon.copy()
+            battery = self.vehicle_battery.copy()
+            lat[moving] += self._rng.uniform(-0.001, 0.001, n_moving)
+            lon[moving] += self._rng.uniform(-0.001, 0.001, n_moving)
+            battery[moving] = np.maximum(0, battery[moving] - self._rng.uniform(0, 2, n_moving))
+            self.vehicle_lat, self.vehicle_lon, self.vehicle_battery = lat, lon, battery
+            
+            self.vehicle_last_reported = np.full(n_vehicles, now, dtype=np.float64)
+            self._vehicle_grid = build_grid_index(self.vehicle_lat, self.vehicle_lon)
+            self._vehicle_trig = trig_table(self.vehicle_lat, self.vehicle_lon)
+            self._vehicle_rentable = self.vehicle_available & (self.vehicle_battery >= 20)
+            self._publish_snapshot()
+    
+    def get_stations_near(self, lat: float, lon: float,
                          radius_m: float = 500) -> List[BikeStation]:
         """주변 따릉이 정거장 검색"""
-        nearby = []
-        
-        for station in self.bike_stations.values():
-            dist = self._haversine_distance(lat, lon, station.lat, station.lon)
-            if dist <= radius_m and station.is_active and station.bikes_available > 0:
-                nearby.append(station)
+        cand = grid_candidates(self._station_grid, lat, lon, radius_m)
+        cand = cand[self._station_rentable[cand]]  # 대여 가능 정거장만 거리 계산
+        cand = cand[planar_within(lat, lon, self.station_lat[cand], self.station_lon[cand],
+                                  radius_m * PLANAR_MARGIN)]
+        dists = haversine_trig(lat, lon, self._station_trig[:, cand])
+        idx = np.flatnonzero(dists <= radius_m)
+        dists, idx = dists[idx], cand[idx]
+        idx = idx[np.argsort(dists, kind='stable')]
         
-        return sorted(nearby, key=lambda s: 
-                     self._haversine_distance(lat, lon, s.lat, s.lon))
+        return [self._station_view(i) for i in idx]
     
-    def get_vehicles_near(self, lat: float, lon: float, 
+    def get_vehicles_near(self, lat: float, lon: float,
                          radius_m: float = 300) -> List[SharedVehicle]:
         """주변 킥보드 검색"""
-        nearby = []
-        
-        for vehicle in self.shared_vehicles.values():
-            if not vehicle.is_available or vehicle.battery < 20:
-                continue
-            
-            dist = self._haversine_distance(lat, lon, vehicle.lat, vehicle.lon)
-            if dist <= radius_m:
-                nearby.append(vehicle)
+        cand = grid_candidates(self._vehicle_grid, lat, lon, radius_m)
+        cand = cand[self._vehicle_rentable[cand]]  # 이용 가능 차량만 거리 계산
+        cand = cand[planar_within(lat, lon, self.vehicle_lat[cand], self.vehicle_lon[cand],
+                                  radius_m * PLANAR_MARGIN)]
+        dists = haversine_trig(lat, lon, self._vehicle_trig[:, cand])
+        idx = np.flatnonzero(dists <= radius_m)
+        dists, idx = dists[idx], cand[idx]
+        idx = idx[np.argsort(dists, kind='stable')]
         
-        return sorted(nearby, key=lambda v: 
-                     self._haversine_distance(lat, lon, v.lat, v.lon))
+        return [self._vehicle_view(i) for i in idx]
     
-    @staticmethod
-    def _haversine_distance(lat1: float, lon1: float, 
-                           lat2: float, lon2: float) -> float:
-        """두 지점 간 거리 계산 (미터)"""
-        R = 6371000  # 지구 반경 (미터)
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        delta_phi = np.radians(lat2 - lat1)
-        delta_lambda = np.radians(lon2 - lon1)
-        
-        a = (np.sin(delta_phi/2)**2 + 
-             np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda/2)**2)
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        
-        return R * c
+    _haversine_distance = staticmethod(_haversine_m)
 
 # 테스트 코드
 if __name__ == "__main__":
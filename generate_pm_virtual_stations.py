@@ -8,22 +8,123 @@
 
 import pandas as pd
 import numpy as np
+import math
+import os
+import sys
 from pathlib import Path
 import json
-from collections import defaultdict
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 import logging
+import matplotlib
+
+# 디스플레이 없는 리눅스(서버/배치 실행)에서는 비대화형 Agg 백엔드 사용
+HEADLESS = (sys.platform.startswith('linux')
+            and not os.environ.get('DISPLAY')
+            and not os.environ.get('WAYLAND_DISPLAY'))
+if HEADLESS and not os.environ.get('MPLBACKEND'):
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib import cm
 
+# PyArrow는 선택적으로 import (없으면 기본 CSV 파서 사용, 결과도 CSV로 저장)
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("⚠️ pyarrow 미설치 - 기본 CSV 파서 사용, 결과는 CSV로 저장")
+
+# 수요 분석에 필요한 좌표 컬럼만 읽기 (x가 위도, y가 경도)
+ROUTE_DTYPES = {'start_x': 'float64', 'start_y': 'float64',
+                'end_x': 'float64', 'end_y': 'float64'}
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 밀집 격자로 집계할 최대 셀 수 (범위 밖 좌표가 섞여 격자가 커지면 groupby 사용)
+DENSE_GRID_MAX_CELLS = 4_000_000
+
+# 미터 → 도 변환 계수 (강남 기준 위도 37.5도로 고정)
+LAT_PER_M = 1.0 / 111000.0  # 1도 ≈ 111km
+LON_PER_M = LAT_PER_M / math.cos(math.radians(37.5))
+
+# 킥보드 분포를 개별 점으로 그릴 최대 개수 (초과 시 격자 밀도 등고선)
+KICKBOARD_SCATTER_MAX = 2000
+
+# 격자별 수요 배열 구조 (격자 크기는 생성기의 grid_size_m 속성)
+DEMAND_DTYPE = np.dtype([('grid_lat', 'f8'), ('grid_lon', 'f8'), ('demand', 'i8')])
+
+
+def aggregate_grid(lat_idx: np.ndarray, lon_idx: np.ndarray,
+                   weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """격자 인덱스별 가중치 합산 - (위도 인덱스, 경도 인덱스, 합계)를 최초 등장 순으로 반환"""
+    if len(lat_idx) > 0:
+        i0, j0 = lat_idx.min(), lon_idx.min()
+        height = int(lat_idx.max() - i0) + 1
+        width = int(lon_idx.max() - j0) + 1
+        
+        if height * width <= DENSE_GRID_MAX_CELLS:
+            # 밀집 격자 셀 번호별 가중치 합과 최초 등장 위치
+            cells = (lat_idx - i0) * width + (lon_idx - j0)
+            sums = np.bincount(cells, weights=weights, minlength=height * width)
+            first = np.full(height * width, len(cells), dtype=np.int64)
+            np.minimum.at(first, cells, np.arange(len(cells)))
+            
+            occupied = np.flatnonzero(first < len(cells))
+            occupied = occupied[np.argsort(first[occupied], kind='stable')]
+            return (occupied // width + i0, occupied % width + j0, sums[occupied])
+    
+    grouped = (pd.DataFrame({'i': lat_idx, 'j': lon_idx, 'w': weights})
+               .groupby(['i', 'j'], sort=False)['w'].sum())
+    return (grouped.index.get_level_values('i').to_numpy(),
+            grouped.index.get_level_values('j').to_numpy(),
+            grouped.to_numpy())
+
+
+def write_table(df: pd.DataFrame, path: Path, write_csv: bool = False) -> List[Path]:
+    """표 저장 - Parquet(zstd), write_csv=True 또는 pyarrow 미설치 시 CSV도 저장 (확장자는 자동 지정)"""
+    written = []
+    if PYARROW_AVAILABLE:
+        written.append(path.with_suffix('.parquet'))
+        df.to_parquet(written[-1], engine='pyarrow', compression='zstd', index=False)
+    if write_csv or not PYARROW_AVAILABLE:
+        written.append(path.with_suffix('.csv'))
+        df.to_csv(written[-1], index=False)
+    return written
+
+
+def sequential_ids(prefix: str, n: int, width: int = 0) -> np.ndarray:
+    """1부터 n까지 일련번호 문자열 배열 (예: VS_0001) - 번호는 width 자리로 0 채움"""
+    if n <= 0:
+        return np.empty(0, dtype=str)
+    numbers = np.arange(1, n + 1).astype(str)
+    return np.char.add(prefix, np.char.zfill(numbers, width))
+
+
+def top_n_indices(values: np.ndarray, n: int) -> np.ndarray:
+    """값 상위 n개 인덱스 (내림차순, 동률은 앞선 인덱스 우선)
+    
+    전체 정렬 대신 np.argpartition으로 n번째 값만 찾은 뒤 n개만 정렬
+    """
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    if n < len(values):
+        kth = values[np.argpartition(-values, n - 1)[n - 1]]
+        above = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:n - len(above)]
+        idx = np.concatenate([above, ties])
+    else:
+        idx = np.arange(len(values))
+    return idx[np.lexsort((idx, -values[idx]))]
+
 class PMVirtualStationGenerator:
     """PM 가상 정거장 생성기"""
     
-    def __init__(self, data_dir: str = 'gangnam_pm_data'):
+    def __init__(self, data_dir: str = 'gangnam_pm_data',
+                 seed: Optional[int] = None):
+        """초기화 (seed: 킥보드 위치/배터리 난수 시드, None이면 비결정적)"""
         self.data_dir = Path(data_dir)
         self.bounds = {
             'min_lat': 37.460,
@@ -31,97 +132,116 @@ class PMVirtualStationGenerator:
             'min_lon': 127.000,
             'max_lon': 127.140
         }
+        self.grid_size_m = 100  # 마지막으로 분석한 격자 크기 (미터)
+        self._rng = np.random.default_rng(seed)
         
     def analyze_swing_routes(self) -> pd.DataFrame:
         """스윙 주행 데이터 분석"""
         logger.info("스윙 주행 데이터 분석 시작...")
         
-        # 주행 데이터 로드
-        routes_file = self.data_dir / 'gangnam_swing_routes_20230510.csv'
-        if not routes_file.exists():
-            raise FileNotFoundError(f"주행 데이터 없음: {routes_file}")
+        # 주행 데이터 로드 (extract_gangnam_pm.py 출력 - Parquet 또는 CSV 중 최신 파일)
+        routes_stem = self.data_dir / 'gangnam_swing_routes_20230510'
+        candidates = [p for p in (routes_stem.with_suffix('.parquet'),
+                                  routes_stem.with_suffix('.csv')) if p.exists()]
+        if not candidates:
+            raise FileNotFoundError(f"주행 데이터 없음: {routes_stem}.parquet / .csv")
+        routes_file = max(candidates, key=lambda p: p.stat().st_mtime)
+        
+        # 필터링된 주행 캐시 (원본보다 최신이면 재사용)
+        cache_file = self.data_dir / '.cache' / 'routes.parquet'
+        if (PYARROW_AVAILABLE and cache_file.exists()
+                and cache_file.stat().st_mtime > routes_file.stat().st_mtime):
+            gangnam_routes = pd.read_parquet(cache_file)
+            logger.info(f"강남구 내 주행 (캐시): {len(gangnam_routes):,}개")
+            return gangnam_routes
             
-        # CSV 읽기
-        routes_df = pd.read_csv(routes_file)
+        # Parquet / CSV 읽기
+        if routes_file.suffix == '.parquet':
+            routes_df = pd.read_parquet(routes_file, columns=list(ROUTE_DTYPES))
+        else:
+            routes_df = pd.read_csv(routes_file,
+                                    engine='pyarrow' if PYARROW_AVAILABLE else 'c',
+                                    usecols=list(ROUTE_DTYPES),
+                                    dtype=ROUTE_DTYPES)
         logger.info(f"총 {len(routes_df):,}개 주행 기록 로드")
         
         # 강남구 내 주행만 필터링
         # 스윙 데이터는 start_x(위도), start_y(경도) 형식 (일반과 반대!)
-        gangnam_routes = routes_df[
-            (routes_df['start_x'] >= self.bounds['min_lat']) &
-            (routes_df['start_x'] <= self.bounds['max_lat']) &
-            (routes_df['start_y'] >= self.bounds['min_lon']) &
-            (routes_df['start_y'] <= self.bounds['max_lon'])
-        ]
+        start_lat = routes_df['start_x'].to_numpy()
+        start_lon = routes_df['start_y'].to_numpy()
+        # 마스크 하나에 in-place로 누적 (임시 배열 최소화)
+        mask = start_lat >= self.bounds['min_lat']
+        mask &= start_lat <= self.bounds['max_lat']
+        mask &= start_lon >= self.bounds['min_lon']
+        mask &= start_lon <= self.bounds['max_lon']
+        gangnam_routes = routes_df[mask]
         
         logger.info(f"강남구 내 주행: {len(gangnam_routes):,}개")
+        
+        # 다음 실행을 위해 캐시 저장 (실패해도 분석은 계속)
+        if PYARROW_AVAILABLE:
+            try:
+                cache_file.parent.mkdir(exist_ok=True)
+                gangnam_routes.to_parquet(cache_file, engine='pyarrow', compression='zstd')
+            except OSError as e:
+                logger.warning(f"주행 캐시 저장 실패: {e}")
+        
         return gangnam_routes
     
     def create_demand_grid(self, routes_df: pd.DataFrame, 
-                          grid_size_m: int = 100) -> Dict:
-        """격자별 수요 분석"""
+                          grid_size_m: int = 100) -> np.ndarray:
+        """격자별 수요 분석 (DEMAND_DTYPE 레코드 배열, 격자 최초 등장 순)"""
         logger.info(f"{grid_size_m}m 격자로 수요 분석...")
         
         # 격자 크기 계산 (도 단위)
-        lat_step = grid_size_m / 111000  # 1도 ≈ 111km
-        lon_step = grid_size_m / (111000 * np.cos(np.radians(37.5)))
-        
-        # 격자별 이용 횟수 집계
-        grid_demand = defaultdict(int)
-        
-        # 출발지 집계
-        for _, route in routes_df.iterrows():
-            grid_lat = round(route['start_x'] / lat_step) * lat_step  # x가 위도
-            grid_lon = round(route['start_y'] / lon_step) * lon_step  # y가 경도
-            grid_demand[(grid_lat, grid_lon)] += 1
-        
-        # 도착지도 집계 (가중치 0.5)
-        for _, route in routes_df.iterrows():
-            grid_lat = round(route['end_x'] / lat_step) * lat_step  # x가 위도 
-            grid_lon = round(route['end_y'] / lon_step) * lon_step  # y가 경도
-            grid_demand[(grid_lat, grid_lon)] += 0.5
-        
-        # 정렬된 리스트로 변환
-        demand_list = []
-        for (lat, lon), count in grid_demand.items():
-            demand_list.append({
-                'grid_lat': lat,
-                'grid_lon': lon,
-                'demand': int(count),
-                'grid_size_m': grid_size_m
-            })
-        
-        # 수요 높은 순으로 정렬
-        demand_list.sort(key=lambda x: x['demand'], reverse=True)
+        lat_step = grid_size_m * LAT_PER_M
+        lon_step = grid_size_m * LON_PER_M
+        
+        # 격자 인덱스 계산 (x가 위도, y가 경도)
+        n_routes = len(routes_df)
+        lat_idx = np.concatenate([
+            np.rint(routes_df['start_x'].to_numpy() / lat_step),
+            np.rint(routes_df['end_x'].to_numpy() / lat_step)
+        ]).astype(np.int64)
+        lon_idx = np.concatenate([
+            np.rint(routes_df['start_y'].to_numpy() / lon_step),
+            np.rint(routes_df['end_y'].to_numpy() / lon_step)
+        ]).astype(np.int64)
+        
+        # 출발지 가중치 1, 도착지 가중치 0.5
+        weights = np.concatenate([np.ones(n_routes), np.full(n_routes, 0.5)])
+        
+        # 격자별 이용 횟수 집계 (처음 등장한 순서 유지)
+        grid_i, grid_j, grid_sum = aggregate_grid(lat_idx, lon_idx, weights)
+        
+        demand_list = np.rec.fromarrays([grid_i * lat_step, grid_j * lon_step, grid_sum],
+                                        dtype=DEMAND_DTYPE)
+        self.grid_size_m = grid_size_m
         
         logger.info(f"총 {len(demand_list)}개 격자에서 이용 확인")
-        logger.info(f"최대 수요: {demand_list[0]['demand']}회")
+        logger.info(f"최대 수요: {demand_list['demand'].max()}회")
         
         return demand_list
     
-    def generate_virtual_stations(self, demand_list: List[Dict], 
+    def generate_virtual_stations(self, demand_list: np.ndarray, 
                                  n_stations: int) -> pd.DataFrame:
         """수요 기반 가상 정거장 생성"""
         logger.info(f"{n_stations}개 가상 정거장 생성...")
         
-        # 상위 n개 격자 선택
-        top_grids = demand_list[:n_stations]
+        # 상위 n개 격자 선택 (수요 높은 순, 동률은 먼저 등장한 격자 우선)
+        top_grids = demand_list[top_n_indices(demand_list['demand'], n_stations)]
+        n = len(top_grids)
         
         # 가상 정거장 데이터프레임 생성
-        stations = []
-        for i, grid in enumerate(top_grids):
-            station = {
-                'station_id': f'VS_{i+1:04d}',
-                'station_name': f'가상정거장_{i+1}',
-                'center_lat': grid['grid_lat'],
-                'center_lon': grid['grid_lon'],
-                'n_kickboards': 0,  # 나중에 배분
-                'grid_size_m': grid['grid_size_m'],
-                'demand': grid['demand']
-            }
-            stations.append(station)
-        
-        stations_df = pd.DataFrame(stations)
+        stations_df = pd.DataFrame({
+            'station_id': sequential_ids('VS_', n, 4),
+            'station_name': sequential_ids('가상정거장_', n),
+            'center_lat': top_grids['grid_lat'],
+            'center_lon': top_grids['grid_lon'],
+            'n_kickboards': np.zeros(n, dtype=np.int32),  # 나중에 배분
+            'grid_size_m': np.full(n, self.grid_size_m, dtype=np.int32),
+            'demand': top_grids['demand']
+        })
         return stations_df
     
     def allocate_kickboards(self, stations_df: pd.DataFrame, 
@@ -129,29 +249,30 @@ class PMVirtualStationGenerator:
         """수요 비례 킥보드 배분"""
         logger.info(f"총 {total_kickboards}개 킥보드를 {len(stations_df)}개 정거장에 배분...")
         
-        # 총 수요
-        total_demand = stations_df['demand'].sum()
-        
-        # 수요 비례 배분
-        stations_df['n_kickboards'] = (
-            stations_df['demand'] / total_demand * total_kickboards
-        ).round().astype(int)
+        # 수요 비례 배분 (정수 부분)
+        demand = stations_df['demand'].to_numpy()
+        quotas = demand / demand.sum() * total_kickboards
+        n_kicks = np.floor(quotas).astype(np.int32)
         
         # 최소 1개는 보장
-        stations_df.loc[stations_df['n_kickboards'] == 0, 'n_kickboards'] = 1
+        n_kicks = np.maximum(n_kicks, 1)
         
-        # 총합 맞추기
-        diff = total_kickboards - stations_df['n_kickboards'].sum()
+        # 총합 맞추기 (최대 잔여법) - 잔여는 최소 보장 이후 기준 (올려 준 정거장은 음수)
+        remainders = quotas - n_kicks
+        diff = total_kickboards - int(n_kicks.sum())
         if diff > 0:
-            # 부족하면 상위 정거장에 추가
-            for i in range(diff):
-                stations_df.loc[i % len(stations_df), 'n_kickboards'] += 1
-        elif diff < 0:
-            # 초과하면 하위 정거장에서 감소
-            for i in range(-diff):
-                idx = -(i % len(stations_df)) - 1
-                if stations_df.iloc[idx]['n_kickboards'] > 1:
-                    stations_df.loc[stations_df.index[idx], 'n_kickboards'] -= 1
+            # 부족하면 잔여가 큰 정거장부터 1개씩 추가
+            n_kicks[top_n_indices(remainders, diff)] += 1
+        while diff < 0:
+            # 초과하면 2개 이상인 정거장 중 잔여가 작은 정거장부터 1개씩 감소
+            reducible = np.flatnonzero(n_kicks > 1)
+            if len(reducible) == 0:
+                break
+            drop = reducible[top_n_indices(-remainders[reducible], -diff)]
+            n_kicks[drop] -= 1
+            diff += len(drop)
+        
+        stations_df['n_kickboards'] = n_kicks
         
         logger.info(f"배분 완료: 평균 {stations_df['n_kickboards'].mean():.1f}개/정거장")
         return stations_df
@@ -160,50 +281,46 @@ class PMVirtualStationGenerator:
         """각 정거장 내 킥보드 위치 생성"""
         logger.info("개별 킥보드 위치 생성...")
         
-        kickboards = []
-        kickboard_id = 1
+        # 킥보드별 소속 정거장 행 인덱스
+        n_kicks = stations_df['n_kickboards'].to_numpy().astype(np.int64)
+        total = int(n_kicks.sum())
+        station_idx = np.repeat(np.arange(len(stations_df)), n_kicks)
         
-        for _, station in stations_df.iterrows():
-            n_kicks = station['n_kickboards']
-            grid_size = station['grid_size_m']
-            
-            # 격자 내 랜덤 위치 생성
-            for i in range(n_kicks):
-                # 격자 내 랜덤 오프셋 (-0.5 ~ 0.5 격자 크기)
-                offset_lat = (np.random.random() - 0.5) * grid_size / 111000
-                offset_lon = (np.random.random() - 0.5) * grid_size / (111000 * np.cos(np.radians(37.5)))
-                
-                kickboard = {
-                    'kickboard_id': f'KB_{kickboard_id:05d}',
-                    'station_id': station['station_id'],
-                    'lat': station['center_lat'] + offset_lat,
-                    'lon': station['center_lon'] + offset_lon,
-                    'battery': np.random.randint(30, 100),  # 30-100% 랜덤
-                    'provider': 'swing'
-                }
-                kickboards.append(kickboard)
-                kickboard_id += 1
-        
-        kickboards_df = pd.DataFrame(kickboards)
+        grid_size = stations_df['grid_size_m'].to_numpy()[station_idx]
+        
+        # 격자 내 랜덤 오프셋 (-0.5 ~ 0.5 격자 크기)
+        offset_lat = (self._rng.random(total) - 0.5) * grid_size * LAT_PER_M
+        offset_lon = (self._rng.random(total) - 0.5) * grid_size * LON_PER_M
+        
+        kickboard_ids = sequential_ids('KB_', total, 5)
+        
+        kickboards_df = pd.DataFrame({
+            'kickboard_id': kickboard_ids,
+            'station_id': stations_df['station_id'].to_numpy()[station_idx],
+            'lat': stations_df['center_lat'].to_numpy()[station_idx] + offset_lat,
+            'lon': stations_df['center_lon'].to_numpy()[station_idx] + offset_lon,
+            'battery': self._rng.integers(30, 100, total),  # 30-100% 랜덤
+            'provider': 'swing'
+        })
         logger.info(f"총 {len(kickboards_df)}개 킥보드 위치 생성 완료")
         return kickboards_df
     
     def save_results(self, stations_df: pd.DataFrame, 
                     kickboards_df: pd.DataFrame,
-                    n_kickboards: int):
-        """결과 저장"""
+                    n_kickboards: int, write_csv: bool = False):
+        """결과 저장 (Parquet, write_csv=True면 기존 CSV 형식도 함께 저장)"""
         output_dir = Path('grid_virtual_stations')
         output_dir.mkdir(exist_ok=True)
         
         # 가상 정거장 저장
-        stations_file = output_dir / f'virtual_stations_{n_kickboards}.csv'
-        stations_df.to_csv(stations_file, index=False)
-        logger.info(f"가상 정거장 저장: {stations_file}")
+        for stations_file in write_table(stations_df, output_dir / f'virtual_stations_{n_kickboards}',
+                                         write_csv):
+            logger.info(f"가상 정거장 저장: {stations_file}")
         
         # 킥보드 위치 저장
-        kickboards_file = output_dir / f'kickboards_{n_kickboards}.csv'
-        kickboards_df.to_csv(kickboards_file, index=False)
-        logger.info(f"킥보드 위치 저장: {kickboards_file}")
+        for kickboards_file in write_table(kickboards_df, output_dir / f'kickboards_{n_kickboards}',
+                                           write_csv):
+            logger.info(f"킥보드 위치 저장: {kickboards_file}")
         
         # 요약 통계 저장
         stats = {
@@ -222,8 +339,9 @@ class PMVirtualStationGenerator:
     
     def visualize_stations(self, stations_df: pd.DataFrame, 
                           kickboards_df: pd.DataFrame,
-                          n_kickboards: int, grid_size_m: int):
-        """가상 정거장 위치 시각화"""
+                          n_kickboards: int, grid_size_m: int,
+                          interactive: bool = True):
+        """가상 정거장 위치 시각화 (interactive=False면 이미지만 저장)"""
         logger.info("가상 정거장 시각화 생성 중...")
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
@@ -236,10 +354,14 @@ class PMVirtualStationGenerator:
                             cmap='YlOrRd',
                             alpha=0.7,
                             edgecolors='black',
-                            linewidth=1)
-        
-        # 상위 10개 정거장 라벨
-        top_stations = stations_df.nlargest(10, 'demand')
+                            linewidth=1,
+                            rasterized=True)
+        
+        # 상위 10개 정거장 라벨 (generate_virtual_stations 결과는 수요 내림차순)
+        if stations_df['demand'].is_monotonic_decreasing:
+            top_stations = stations_df.head(10)
+        else:
+            top_stations = stations_df.nlargest(10, 'demand')
         for _, station in top_stations.iterrows():
             ax1.annotate(station['station_id'][-3:], 
                        (station['center_lon'], station['center_lat']),
@@ -262,18 +384,14 @@ class PMVirtualStationGenerator:
         
         # 2. 오른쪽: 히트맵 스타일 격자 시각화
         # 격자별 수요 재계산
-        lat_bins = np.arange(self.bounds['min_lat'], self.bounds['max_lat'], grid_size_m/111000)
-        lon_bins = np.arange(self.bounds['min_lon'], self.bounds['max_lon'], grid_size_m/(111000*np.cos(np.radians(37.5))))
-        
-        # 2D 히스토그램 생성
-        demand_grid = np.zeros((len(lat_bins)-1, len(lon_bins)-1))
+        lat_bins = np.arange(self.bounds['min_lat'], self.bounds['max_lat'], grid_size_m * LAT_PER_M)
+        lon_bins = np.arange(self.bounds['min_lon'], self.bounds['max_lon'], grid_size_m * LON_PER_M)
         
-        for _, station in stations_df.iterrows():
-            lat_idx = np.digitize(station['center_lat'], lat_bins) - 1
-            lon_idx = np.digitize(station['center_lon'], lon_bins) - 1
-            
-            if 0 <= lat_idx < len(lat_bins)-1 and 0 <= lon_idx < len(lon_bins)-1:
-                demand_grid[lat_idx, lon_idx] = station['demand']
+        # 2D 히스토그램 생성 (같은 격자의 정거장 수요는 합산)
+        demand_grid, _, _ = np.histogram2d(stations_df['center_lat'].to_numpy(),
+                                           stations_df['center_lon'].to_numpy(),
+                                           bins=[lat_bins, lon_bins],
+                                           weights=stations_df['demand'].to_numpy())
         
         # 히트맵 플롯
         im = ax2.imshow(demand_grid, 
@@ -284,9 +402,17 @@ class PMVirtualStationGenerator:
                        aspect='auto',
                        interpolation='nearest')
         
-        # 킥보드 위치 점들 (작게)
-        ax2.scatter(kickboards_df['lon'], kickboards_df['lat'],
-                   s=1, c='blue', alpha=0.3, marker='.')
+        # 킥보드 위치 점들 (작게, 래스터화) - 많으면 격자별 밀도 등고선
+        if len(kickboards_df) > KICKBOARD_SCATTER_MAX:
+            kick_grid, _, _ = np.histogram2d(kickboards_df['lat'].to_numpy(),
+                                             kickboards_df['lon'].to_numpy(),
+                                             bins=[lat_bins, lon_bins])
+            ax2.contour((lon_bins[:-1] + lon_bins[1:]) / 2,
+                        (lat_bins[:-1] + lat_bins[1:]) / 2,
+                        kick_grid, colors='blue', alpha=0.3, linewidths=0.5)
+        else:
+            ax2.scatter(kickboards_df['lon'], kickboards_df['lat'],
+                       s=1, c='blue', alpha=0.3, marker='.', rasterized=True)
         
         ax2.set_xlabel('경도 (Longitude)')
         ax2.set_ylabel('위도 (Latitude)')
@@ -314,14 +440,18 @@ class PMVirtualStationGenerator:
         
         plt.tight_layout()
         
-        # 파일 저장
+        # 파일 저장 (여백 영역을 미리 계산해 저장 시 재렌더링 방지)
         output_dir = Path('grid_virtual_stations')
         image_file = output_dir / f'virtual_stations_{n_kickboards}.png'
-        plt.savefig(image_file, dpi=300, bbox_inches='tight')
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.1)
+        plt.savefig(image_file, dpi=300, bbox_inches=bbox)
         logger.info(f"시각화 이미지 저장: {image_file}")
         
         # 화면에 표시
-        plt.show()
+        if interactive and not HEADLESS:
+            plt.show()
+        else:
+            plt.close(fig)
 
 
 def main():
@@ -336,7 +466,7 @@ def main():
         routes_df = generator.analyze_swing_routes()
     except FileNotFoundError as e:
         print(f"❌ 오류: {e}")
-        print("gangnam_pm_data/gangnam_swing_routes_20230510.csv 파일이 필요합니다.")
+        print("gangnam_pm_data/gangnam_swing_routes_20230510.parquet(.csv) 파일이 필요합니다.")
         return
     
     # 2. 격자 수요 분석
@@ -396,8 +526,8 @@ def main():
     print(f"- 최대 수요 정거장: {stations_df.iloc[0]['station_name']} ({stations_df.iloc[0]['demand']}회)")
     
     print("\n생성된 파일:")
-    print(f"- grid_virtual_stations/virtual_stations_{n_kickboards}.csv")
-    print(f"- grid_virtual_stations/kickboards_{n_kickboards}.csv")
+    print(f"- grid_virtual_stations/virtual_stations_{n_kickboards}.parquet(.csv)")
+    print(f"- grid_virtual_stations/kickboards_{n_kickboards}.parquet(.csv)")
     print(f"- grid_virtual_stations/stats_{n_kickboards}.json")
     print(f"- grid_virtual_stations/virtual_stations_{n_kickboards}.png")
 
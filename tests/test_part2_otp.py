@@ -0,0 +1,150 @@
+"""PART2_OTP RAPTOR 회귀 테스트 (합성 네트워크)"""
+
+import sys
+import types
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# virtual_stop_generator는 저장소에 없고 PART2_OTP는 import 실패 시 종료하므로 빈 모듈로 대체
+_vsg = types.ModuleType('virtual_stop_generator')
+_vsg.VirtualStop = type('VirtualStop', (), {})
+_vsg.VirtualRoute = type('VirtualRoute', (), {})
+sys.modules.setdefault('virtual_stop_generator', _vsg)
+
+import PART2_OTP as otp
+from PART1_2 import Stop, Route
+
+N_SEEDS = 30
+
+
+def build_network(seed: int, n_stops: int = 300, n_routes: int = 60):
+    """무작위 정류장/노선/도보 환승으로 OTPStyleMultimodalRAPTOR 구성 (파일 로드 없이)"""
+    rng = np.random.default_rng(seed)
+    raptor = object.__new__(otp.OTPStyleMultimodalRAPTOR)
+    
+    raptor.all_stops = {
+        f'S{i}': Stop(f'S{i}', f'S{i}', 37.49 + rng.random() * 0.04,
+                      127.02 + rng.random() * 0.04, 0)
+        for i in range(n_stops)
+    }
+    raptor.all_routes = {}
+    raptor.all_trips = {}
+    raptor.all_timetables = {}
+    raptor.all_route_stops = {}
+    raptor.all_transfers = defaultdict(list)
+    raptor.virtual_stops = {}
+    raptor.virtual_routes = {}
+    raptor.kickboard_locations = {}
+    raptor.bike_stations = {}
+    raptor._virtual_timetable_cache = {}
+    
+    for k in range(n_routes):
+        route_id = f'R{k}'
+        stops = [f'S{i}' for i in rng.choice(n_stops, int(rng.integers(5, 15)), replace=False)]
+        hops = rng.integers(1, 8, len(stops))
+        hops[0] = 0
+        departures = np.arange(360, 600, int(rng.integers(5, 20))) + int(rng.integers(0, 10))
+        raptor.all_routes[route_id] = Route(route_id, route_id, route_id, 3, stops)
+        raptor.all_route_stops[route_id] = stops
+        raptor.all_timetables[route_id] = (departures[None, :]
+                                           + np.cumsum(hops)[:, None]).astype(np.int32)
+    
+    for _ in range(n_stops * 2):
+        a, b = rng.choice(n_stops, 2, replace=False)
+        raptor.all_transfers[f'S{a}'].append((f'S{b}', int(rng.integers(1, 10))))
+    
+    raptor._build_integrated_network()
+    return raptor, rng
+
+
+def random_stops(rng, n_stops: int, k: int = 3):
+    """무작위 (정류장 ID, 도보 시간) 목록"""
+    return [(f'S{i}', int(rng.integers(0, 5))) for i in rng.choice(n_stops, k, replace=False)]
+
+
+def reference_tau(raptor, origin_stops, dep_time: int, max_rounds: int) -> np.ndarray:
+    """원래 PART2_OTP의 집합/딕셔너리 기반 RAPTOR 루프 - 정류장별 최종 도착 시간
+    
+    모든 노선을 순서대로 스캔하며 tau를 바로 갱신 (앞선 노선의 개선이 뒤 노선 탑승에 반영)
+    환승은 개선된 정류장 집합의 순회 순서대로 완화
+    """
+    tau = np.full(len(raptor.all_stops), np.inf)
+    marked_stops = set()
+    for stop_id, walk_time in origin_stops:
+        idx = raptor.stop_id_to_idx[stop_id]
+        tau[idx] = dep_time + walk_time
+        marked_stops.add(idx)
+    
+    for _ in range(max_rounds):
+        if not marked_stops:
+            break
+        
+        new_marked = set()
+        for route_id in raptor.all_routes.keys():
+            earliest_trip = -1
+            timetable = raptor.all_timetables[route_id]
+            for seq, stop_id in enumerate(raptor.all_route_stops[route_id]):
+                stop_idx = raptor.stop_id_to_idx[stop_id]
+                if stop_idx in marked_stops and earliest_trip == -1:
+                    trip_idx = int(np.searchsorted(timetable[seq], tau[stop_idx]))
+                    if trip_idx < len(timetable[seq]):
+                        earliest_trip = trip_idx
+                elif earliest_trip != -1:
+                    arrival = timetable[seq][earliest_trip]
+                    if arrival < tau[stop_idx]:
+                        tau[stop_idx] = arrival
+                        new_marked.add(stop_idx)
+        
+        marked_stops = new_marked.copy()
+        for stop_idx in new_marked:
+            for next_stop_id, transfer_time in raptor.all_transfers[raptor.stop_idx_to_id[stop_idx]]:
+                next_idx = raptor.stop_id_to_idx[next_stop_id]
+                new_arrival = tau[stop_idx] + transfer_time
+                if new_arrival < tau[next_idx]:
+                    tau[next_idx] = new_arrival
+                    marked_stops.add(next_idx)
+    
+    return tau
+
+
+def journey_summary(journeys):
+    """비교용 여정 요약 (총 소요 시간, 구간별 종류/출발/도착/소요 시간)"""
+    return [(j.total_time, [(leg['type'], leg['from'], leg['to'], leg['duration'])
+                            for leg in j.legs])
+            for j in journeys]
+
+
+@pytest.mark.parametrize('seed', range(N_SEEDS))
+def test_raptor_rounds_match_reference(seed):
+    """커널 RAPTOR 결과가 원래 Python 루프와 같음 (목적지 가지치기 등 회귀 확인)"""
+    raptor, rng = build_network(seed)
+    origin_stops = random_stops(rng, len(raptor.all_stops))
+    
+    tau_round, _ = raptor._raptor_rounds(origin_stops, 480, 5)
+    tau = tau_round.min(axis=0).astype(float)
+    tau[tau == otp.TAU_INF] = np.inf
+    
+    np.testing.assert_array_equal(tau, reference_tau(raptor, origin_stops, 480, 5))
+
+
+@pytest.mark.parametrize('seed', range(N_SEEDS))
+def test_find_routes_many_matches_find_routes(seed):
+    """일괄 탐색 결과가 쌍별 find_routes 결과와 같음"""
+    raptor, rng = build_network(seed)
+    origins = [(37.49 + rng.random() * 0.04, 127.02 + rng.random() * 0.04) for _ in range(4)]
+    destinations = [(37.49 + rng.random() * 0.04, 127.02 + rng.random() * 0.04)
+                    for _ in range(8)]
+    # 같은 출발지/출발 시간을 공유하는 쌍 포함
+    pairs = [(origins[i % 4], destinations[i], ['08:00', '08:30'][i % 2]) for i in range(8)]
+    
+    batch = raptor.find_routes_many(*map(list, zip(*pairs)))
+    assert any(batch)
+    
+    for (origin, destination, departure_time), journeys in zip(pairs, batch):
+        single = raptor.find_routes(origin, destination, departure_time)
+        assert journey_summary(journeys) == journey_summary(single)
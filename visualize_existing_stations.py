@@ -6,12 +6,19 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 from generate_pm_virtual_stations import PMVirtualStationGenerator
 
+def load_table(path: Path) -> pd.DataFrame:
+    """Parquet 우선 로드, 없으면 기존 CSV 로드"""
+    parquet_file = path.with_suffix('.parquet')
+    if parquet_file.exists():
+        return pd.read_parquet(parquet_file)
+    return pd.read_csv(path.with_suffix('.csv'))
+
 def visualize_existing(n_kickboards=500):
     """이미 생성된 데이터 시각화"""
     # 데이터 로드
     output_dir = Path('grid_virtual_stations')
-    stations_df = pd.read_csv(output_dir / f'virtual_stations_{n_kickboards}.csv')
-    kickboards_df = pd.read_csv(output_dir / f'kickboards_{n_kickboards}.csv')
+    stations_df = load_table(output_dir / f'virtual_stations_{n_kickboards}')
+    kickboards_df = load_table(output_dir / f'kickboards_{n_kickboards}')
     
     # 생성기 인스턴스 (시각화 메서드 사용)
     generator = PMVirtualStationGenerator()
@@ -25,5 +32,6 @@ if __name__ == "__main__":
     visualize_existing(500)
     
     # 300개 버전도 있으면 시각화
-    if Path('grid_virtual_stations/virtual_stations_300.csv').exists():
+    if any(Path(f'grid_virtual_stations/virtual_stations_300.{ext}').exists()
+           for ext in ('parquet', 'csv')):
         visualize_existing(300)
\ No newline at end of file